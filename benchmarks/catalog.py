@@ -0,0 +1,99 @@
+import math
+import random
+
+"""
+This script describes a synthetic supplier catalog for the benchmarks.
+Every schematic sits behind the same dropdown path the real site uses
+(brand, year, model, schematic) and lists a fixed number of parts; every
+superseded_every-th part has been replaced by a new part number, shown with a
+"replaces part #" line. The fake site, the fake Trading API and the database
+generator all derive their data from the same Catalog, so they agree on MPNs.
+"""
+
+BRANDS = ["Arctic-Cat", "Honda", "Kawasaki", "Polaris", "Suzuki", "Yamaha"]
+YEARS = 20  # Model years per brand
+MODELS = 5  # Models per brand and year
+
+
+class Catalog:
+    def __init__(self, size, parts_per_schematic=25, superseded_every=20, listed_fraction=0.5, seed=0):
+        self.size = size  # Number of parts in the database
+        self.parts_per_schematic = parts_per_schematic
+        self.superseded_every = superseded_every  # 0 for no superseded parts
+        self.listed_fraction = listed_fraction  # Share of parts with an eBay listing
+        self.seed = seed
+        self.schematic_count = math.ceil(size / parts_per_schematic)
+
+        # Dropdown tree: brand -> year -> model -> schematic -> schematic number
+        self.tree = {}
+        for number in range(self.schematic_count):
+            brand, year, model, schematic = self.path(number)
+            self.tree.setdefault(brand, {}).setdefault(year, {}).setdefault(model, {})[schematic] = number
+
+    def path(self, number):
+        """Instruction path of a schematic, as stored in the database."""
+        brand = BRANDS[number % len(BRANDS)]
+        rest = number // len(BRANDS)
+        year = str(2024 - rest % YEARS)
+        model = f"Model-{rest // YEARS % MODELS}"
+        return [brand, year, model, f"SCH{number:06d}"]
+
+    def find(self, path):
+        """Schematic number for a full instruction path, or None."""
+        try:
+            brand, year, model, schematic = path
+            return self.tree[brand][year][model][schematic]
+        except (KeyError, ValueError):
+            return None
+
+    def options(self, path):
+        """Values offered by the dropdown after the given path prefix."""
+        node = self.tree
+        for value in path:
+            node = node.get(value) if isinstance(node, dict) else None
+            if node is None:
+                return []
+        return sorted(node) if isinstance(node, dict) else []
+
+    def rows(self, number):
+        """Assembly table rows of a schematic, as the site shows them."""
+        rng = random.Random(self.seed * 1000003 + number)
+        first = number * self.parts_per_schematic
+        rows = []
+        for index in range(first, min(first + self.parts_per_schematic, self.size)):
+            mpn = self.listed_mpn(index)
+            price = round(rng.uniform(2, 400), 2)
+            rows.append({
+                "partNum": mpn,
+                "replaces": f"replaces part # {self.db_mpn(index)}" if mpn != self.db_mpn(index) else "",
+                "status": "In-Stock" if rng.random() < 0.85 else "Out of Stock",
+                "regPrice": f"${price * 1.15:,.2f}",
+                "ourPrice": f"${price:,.2f}" if rng.random() < 0.95 else "-"
+            })
+        return rows
+
+    def db_mpn(self, index):
+        """Part number the database starts with."""
+        return f"{index // self.parts_per_schematic:06d}-{index % self.parts_per_schematic:03d}"
+
+    def listed_mpn(self, index):
+        """Part number the site currently shows (the replacement, for superseded parts)."""
+        mpn = self.db_mpn(index)
+        if self.superseded_every and index % self.superseded_every == self.superseded_every - 1:
+            return mpn + "R"
+        return mpn
+
+    def parts(self):
+        """(MPN, brand, instructions) for every part, in database order."""
+        for index in range(self.size):
+            instructions = self.path(index // self.parts_per_schematic)
+            yield self.db_mpn(index), instructions[0], instructions
+
+    def listings(self):
+        """(ItemID, MPN, price) for the parts listed on the fake store."""
+        rng = random.Random(self.seed)
+        listings = []
+        for index in range(self.size):
+            if rng.random() < self.listed_fraction:
+                listings.append((str(110000000000 + index), self.listed_mpn(index), round(rng.uniform(10, 500), 2)))
+        return listings
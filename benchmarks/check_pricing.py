@@ -0,0 +1,75 @@
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pricing import DEFAULT_RULES, PricingEngine
+
+"""
+This script checks that pricing.DEFAULT_RULES still prices exactly like the original
+hard-coded EbayAPIInterface.calculate_price, so an edit to the rules can't silently
+change live prices. It compares every cent up to $600, a few cents either side of each
+shipping and tier boundary, and a random sample of larger prices; it exits with 1 on
+any mismatch.
+
+    python benchmarks/check_pricing.py
+"""
+
+def original_price(rm_price):
+    """calculate_price as it was before the pricing engine, kept verbatim as the reference."""
+    def round_to_nearest(num, base=5):
+        # Format of ###.95
+        return (base * round(num / base)) - 0.02
+
+    total = rm_price + 0.3  # 30 cent transaction fee
+    if total < 75:
+        total += 7
+
+    if total < 25:
+        total = (total + 5) / 0.88
+    elif total <= 50:
+        total = (total + 10) / 0.88
+    elif total <= 100:
+        total = (total * 1.3) / 0.88
+    elif total <= 200:
+        total = (total * 1.35) / 0.88
+    elif total > 200:
+        total = (total * 1.4) / 0.88
+
+    total = round_to_nearest(total, 5)
+
+    return total
+
+
+def sample_prices(samples, seed=0):
+    prices = [cents / 100 for cents in range(0, 60001)]
+
+    # Supplier prices that land the cost after fees and shipping on each boundary
+    for boundary in (25, 50, 75, 100, 200):
+        for shipping in (0, 7):
+            for offset in range(-3, 4):
+                price = round(boundary - 0.3 - shipping + offset / 100, 2)
+                if price >= 0:
+                    prices.append(price)
+
+    rng = random.Random(seed)
+    prices += [round(rng.uniform(0, 5000), 2) for _ in range(samples)]
+    return prices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the pricing engine against the original pricing function.")
+    parser.add_argument("--samples", type=int, default=200000, help="Random prices to check on top of the fixed grid")
+    args = parser.parse_args()
+
+    prices = sample_prices(args.samples)
+    engine_prices = PricingEngine(DEFAULT_RULES).price(prices)
+
+    mismatches = [(price, original_price(price), float(new)) for price, new in zip(prices, engine_prices)
+                  if round(original_price(price), 2) != round(float(new), 2)]
+
+    for price, expected, got in mismatches[:20]:
+        print(f"RM price {price}: original {expected}, engine {got}")
+    print(f"Checked {len(prices)} prices: {len(mismatches)} mismatch(es)")
+    sys.exit(1 if mismatches else 0)
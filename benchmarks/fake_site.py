@@ -0,0 +1,149 @@
+import json
+import time
+import html
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from catalog import Catalog
+
+"""
+This script serves a local stand-in for the supplier's OEM parts pages.
+/oem-parts/<brand> shows the same dropdown titles as the real site; picking an option
+fetches the next dropdown's options, and picking the schematic fetches the
+#oemparts_tblAssmDetails table (as JSON, like a background request) and pushes the
+schematic's own URL, which serves the table directly on later visits. Every request
+waits `latency` seconds first.
+"""
+
+TITLES = ["First Choice", "Second Choice", "Third Choice", "Parts Schematic"]
+
+PAGE_SCRIPT = """
+const selects = Array.from(document.querySelectorAll('select'));
+selects.forEach((select, level) => select.addEventListener('change', async () => {
+    const path = selects.slice(0, level + 1).map(s => s.value);
+    if (level === 0) {
+        location.href = '/oem-parts/' + encodeURIComponent(select.value);
+        return;
+    }
+    for (const later of selects.slice(level + 1)) {
+        later.innerHTML = '<option value="">Select</option>';
+    }
+    document.getElementById('assembly').innerHTML = '';
+    const query = encodeURIComponent(JSON.stringify(path));
+    if (level + 1 < selects.length) {
+        const options = await (await fetch('/api/options?path=' + query)).json();
+        selects[level + 1].innerHTML += options.map(value => `<option value="${value}">${value}</option>`).join('');
+    } else {
+        const data = await (await fetch('/api/assembly?path=' + query)).json();
+        document.getElementById('assembly').innerHTML = data.html;
+        history.pushState(null, '', '/oem-parts/' + path.map(encodeURIComponent).join('/'));
+    }
+}));
+"""
+
+
+def table_html(rows):
+    body = []
+    for row in rows:
+        replaces = f"<p>{html.escape(row['replaces'])}</p>" if row["replaces"] else ""
+        body.append(
+            f"<tr><td class=\"partNum\"><span>{html.escape(row['partNum'])}</span>{replaces}</td>"
+            f"<td class=\"status\">{row['status']}</td>"
+            f"<td class=\"regPrice\">{row['regPrice']}</td>"
+            f"<td class=\"ourPrice\">{row['ourPrice']}</td></tr>"
+        )
+    return (
+        "<table id=\"oemparts_tblAssmDetails\"><thead><tr><th>Part</th><th>Status</th>"
+        "<th>MSRP</th><th>Our Price</th></tr></thead><tbody>" + "".join(body) + "</tbody></table>"
+    )
+
+
+def select_html(title, options, selected=None):
+    items = ["<option value=\"\">Select</option>"]
+    for value in options:
+        label = value.replace("-", " ") if title == "First Choice" else value
+        chosen = " selected" if value == selected else ""
+        items.append(f"<option value=\"{html.escape(value)}\"{chosen}>{html.escape(label)}</option>")
+    return f"<select title=\"{title}\">{''.join(items)}</select>"
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    catalog = None
+    latency = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def do_GET(self):
+        with self.lock:
+            SiteHandler.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+
+        if parts[:1] == ["api"]:
+            path = json.loads(query.get("path", ["[]"])[0])
+            if parts[1:] == ["options"]:
+                return self.send(json.dumps(self.catalog.options(path)), "application/json")
+            if parts[1:] == ["assembly"]:
+                number = self.catalog.find(path)
+                if number is None:
+                    return self.send("{}", "application/json", 404)
+                return self.send(json.dumps({"html": table_html(self.catalog.rows(number))}), "application/json")
+
+        if parts[:1] == ["oem-parts"] and len(parts) <= 5:
+            return self.send(self.page(parts[1:]), "text/html")
+        self.send("Not found", "text/plain", 404)
+
+    def page(self, path):
+        """Dropdowns filled down to the given path; a full path also renders the table."""
+        selects = []
+        for level, title in enumerate(TITLES):
+            options = self.catalog.options(path[:level]) if level <= len(path) else []
+            selects.append(select_html(title, options, path[level] if level < len(path) else None))
+
+        number = self.catalog.find(path) if len(path) == len(TITLES) else None
+        table = table_html(self.catalog.rows(number)) if number is not None else ""
+        return (
+            "<!DOCTYPE html><html><head><title>OEM Parts</title></head><body>"
+            + "".join(selects)
+            + f"<div id=\"assembly\">{table}</div><script>{PAGE_SCRIPT}</script></body></html>"
+        )
+
+    def send(self, text, content_type, status=200):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start(catalog, latency=0.0, port=0):
+    """Serve the catalog on a background thread; returns (server, base_url)."""
+    handler = type("Handler", (SiteHandler,), {"catalog": catalog, "latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake supplier site for manual testing.")
+    parser.add_argument("--size", type=int, default=1000, help="Parts in the catalog")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every request")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server, base_url = start(Catalog(args.size), args.latency, args.port)
+    print(f"Serving {args.size} parts at {base_url}/oem-parts (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,135 @@
+import time
+import random
+import threading
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+"""
+This script serves a local stand-in for the eBay Trading API (/ws/api.dll).
+It answers GetMyeBaySelling, GetItem, ReviseInventoryStatus and ReviseFixedPriceItem
+for an in-memory store, counts calls per verb, and can add latency and answer a
+share of calls with eBay's call-limit error (518) to exercise the retry path.
+Point EbayAPIInterface at it with `domain: 127.0.0.1:<port>` and `https: false`
+in ebay.yaml.
+"""
+
+NAMESPACE = "urn:ebay:apis:eBLBaseComponents"
+
+
+def strip_namespaces(root):
+    for element in root.iter():
+        element.tag = element.tag.split("}")[-1]
+    return root
+
+
+class Store:
+    def __init__(self, listings):
+        self.items = {item_id: {"MPN": mpn, "Price": price} for item_id, mpn, price in listings}
+        self.order = list(self.items)
+        self.calls = {}  # Verb -> number of calls
+        self.lock = threading.Lock()
+
+    def count(self, verb):
+        with self.lock:
+            self.calls[verb] = self.calls.get(verb, 0) + 1
+
+
+class TradingHandler(BaseHTTPRequestHandler):
+    store = None
+    latency = 0.0
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        verb = self.headers.get("X-EBAY-API-CALL-NAME", "")
+        request = strip_namespaces(ET.fromstring(self.rfile.read(int(self.headers.get("Content-Length", 0)))))
+        self.store.count(verb)
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.error_rate and random.random() < self.error_rate:
+            return self.reply(verb, "Failure", "<Errors><ShortMessage>Call usage limit has been reached.</ShortMessage>"
+                                               "<ErrorCode>518</ErrorCode><SeverityCode>Error</SeverityCode></Errors>")
+
+        handler = getattr(self, verb, None)
+        if handler is None:
+            return self.reply(verb, "Failure", f"<Errors><ShortMessage>Unsupported call {escape(verb)}</ShortMessage>"
+                                               "<ErrorCode>2</ErrorCode><SeverityCode>Error</SeverityCode></Errors>")
+        handler(verb, request)
+
+    def GetMyeBaySelling(self, verb, request):
+        per_page = int(request.findtext("ActiveList/Pagination/EntriesPerPage") or 100)
+        page = int(request.findtext("ActiveList/Pagination/PageNumber") or 1)
+        order = self.store.order
+        pages = max(1, -(-len(order) // per_page))
+
+        items = []
+        for item_id in order[(page - 1) * per_page:page * per_page]:
+            items.append(
+                f"<Item><ItemID>{item_id}</ItemID><SellingStatus>"
+                f"<CurrentPrice currencyID=\"USD\">{self.store.items[item_id]['Price']:.2f}</CurrentPrice>"
+                "</SellingStatus></Item>"
+            )
+        self.reply(verb, "Success", (
+            f"<ActiveList><ItemArray>{''.join(items)}</ItemArray><PaginationResult>"
+            f"<TotalNumberOfPages>{pages}</TotalNumberOfPages><TotalNumberOfEntries>{len(order)}</TotalNumberOfEntries>"
+            "</PaginationResult></ActiveList>"
+        ))
+
+    def GetItem(self, verb, request):
+        item_id = request.findtext("ItemID")
+        item = self.store.items.get(item_id)
+        if item is None:
+            return self.reply(verb, "Failure", "<Errors><ShortMessage>Item not found.</ShortMessage>"
+                                               "<ErrorCode>17</ErrorCode><SeverityCode>Error</SeverityCode></Errors>")
+        self.reply(verb, "Success", (
+            f"<Item><ItemID>{item_id}</ItemID><ItemSpecifics>"
+            "<NameValueList><Name>Brand</Name><Value>OEM</Value></NameValueList>"
+            f"<NameValueList><Name>Manufacturer Part Number</Name><Value>{escape(item['MPN'])}</Value></NameValueList>"
+            "</ItemSpecifics></Item>"
+        ))
+
+    def ReviseInventoryStatus(self, verb, request):
+        revised = []
+        for status in request.findall("InventoryStatus"):
+            item_id = status.findtext("ItemID")
+            if item_id not in self.store.items:
+                return self.reply(verb, "Failure", "<Errors><ShortMessage>Auction ended.</ShortMessage>"
+                                                   "<ErrorCode>291</ErrorCode><SeverityCode>Error</SeverityCode></Errors>")
+            self.store.items[item_id]["Price"] = float(status.findtext("StartPrice"))
+            revised.append(f"<InventoryStatus><ItemID>{item_id}</ItemID></InventoryStatus>")
+        self.reply(verb, "Success", "".join(revised))
+
+    def ReviseFixedPriceItem(self, verb, request):
+        item_id = request.findtext("Item/ItemID")
+        if item_id not in self.store.items:
+            return self.reply(verb, "Failure", "<Errors><ShortMessage>Auction ended.</ShortMessage>"
+                                               "<ErrorCode>291</ErrorCode><SeverityCode>Error</SeverityCode></Errors>")
+        price = request.findtext("Item/StartPrice")
+        if price is not None:
+            self.store.items[item_id]["Price"] = float(price)
+        self.reply(verb, "Success", f"<ItemID>{item_id}</ItemID>")
+
+    def reply(self, verb, ack, body):
+        text = (
+            f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><{verb}Response xmlns=\"{NAMESPACE}\">"
+            f"<Timestamp>{time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())}</Timestamp>"
+            f"<Ack>{ack}</Ack><Version>1085</Version>{body}</{verb}Response>"
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(text)))
+        self.end_headers()
+        self.wfile.write(text)
+
+
+def start(store, latency=0.0, error_rate=0.0, port=0):
+    """Serve the store on a background thread; returns (server, domain) for ebay.yaml."""
+    handler = type("Handler", (TradingHandler,), {"store": store, "latency": latency, "error_rate": error_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"127.0.0.1:{server.server_address[1]}"
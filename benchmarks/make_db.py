@@ -0,0 +1,51 @@
+import os
+import sys
+import argparse
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+from catalog import Catalog
+
+"""
+This script writes a synthetic parts_database.db for a benchmark catalog.
+Every part starts out unpriced and 30 days stale, with the instruction path of
+its schematic, so a refresh run has to visit every schematic.
+"""
+
+def build(catalog, path="parts_database.db"):
+    """Create a fresh database at path holding every part in the catalog."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    db.close_connection()
+    db.DB_PATH = path
+    db.create_database()
+
+    stale = (date.today() - timedelta(days=30)).strftime("%Y-%m-%d")
+    schematic_ids = {}
+    rows = []
+    with db.transaction() as cursor:
+        for mpn, brand, instructions in catalog.parts():
+            key = tuple(instructions)
+            if key not in schematic_ids:
+                schematic_ids[key] = db.get_schematic_id(cursor, instructions)
+            rows.append((mpn, 1, 0.0, brand, schematic_ids[key], None, stale))
+        cursor.executemany('''
+            INSERT INTO parts (MPN, "In-Stock", Price, Brand, SchematicID, ID, Date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    db.close_connection()
+    print(f"Wrote {len(rows)} parts on {len(schematic_ids)} schematics to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic parts database.")
+    parser.add_argument("--size", type=int, default=1000, help="Parts in the catalog")
+    parser.add_argument("--parts-per-schematic", type=int, default=25)
+    parser.add_argument("--output", default="parts_database.db")
+    args = parser.parse_args()
+
+    build(Catalog(args.size, args.parts_per_schematic), args.output)
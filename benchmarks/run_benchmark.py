@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from catalog import Catalog
+import fake_site
+import fake_trading
+import make_db
+
+"""
+This script measures a full refresh (scrape -> price -> eBay revisions) offline.
+For each catalog size it writes a synthetic database, serves the catalog from the
+fake supplier site and the listings from the fake Trading API, and runs
+pipeline.Pipeline in a fresh process per pass (so peak memory is per pass):
+
+    pass 1 (cold): full listing reconcile, every schematic navigated in the browser
+    pass 2+ (warm): last pushed prices, remembered schematic URLs / fast path
+
+It reports parts per minute, eBay API calls per listed SKU, site requests per part
+and peak memory, and can save the results as JSON to compare against later runs.
+
+    python benchmarks/run_benchmark.py --sizes 1000 10000 100000
+"""
+
+def run_pass(args, workdir, site_url, reconcile):
+    """Run one pipeline pass in a child process and return its result dict."""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--site", site_url, "--workers", str(args.workers)
+    ]
+    if args.fast_path:
+        command.append("--fast-path")
+    if reconcile:
+        command.append("--reconcile")
+
+    with open(os.path.join(workdir, "benchmark.log"), "a") as log:
+        subprocess.run(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT, check=True)
+    with open(os.path.join(workdir, "result.json"), "r") as file:
+        return json.load(file)
+
+
+def run_size(args, size):
+    workdir = tempfile.mkdtemp(prefix=f"scraper-bench-{size}-")
+    catalog = Catalog(size, args.parts_per_schematic, listed_fraction=args.listed_fraction)
+    make_db.build(catalog, os.path.join(workdir, "parts_database.db"))
+
+    store = fake_trading.Store(catalog.listings())
+    site, site_url = fake_site.start(catalog, args.latency)
+    trading, domain = fake_trading.start(store, args.ebay_latency, args.ebay_error_rate)
+    with open(os.path.join(workdir, "ebay.yaml"), "w") as file:
+        file.write(f"appid: bench\ndevid: bench\ncertid: bench\ntoken: bench\ndomain: '{domain}'\nhttps: false\n")
+
+    results = []
+    try:
+        for number in range(args.passes):
+            site_requests = fake_site.SiteHandler.requests
+            calls = dict(store.calls)
+
+            result = run_pass(args, workdir, site_url, reconcile=number == 0)
+
+            api_calls = {verb: count - calls.get(verb, 0) for verb, count in store.calls.items() if count > calls.get(verb, 0)}
+            result.update({
+                "size": size,
+                "pass": "cold" if number == 0 else "warm",
+                "listings": len(store.order),
+                "site_requests_per_part": (fake_site.SiteHandler.requests - site_requests) / size,
+                "api_calls": api_calls,
+                "api_calls_per_sku": sum(api_calls.values()) / max(len(store.order), 1)
+            })
+            results.append(result)
+            print_result(result)
+    finally:
+        site.shutdown()
+        trading.shutdown()
+        if args.keep:
+            print(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def print_result(result):
+    print(
+        f"{result['size']:>7} parts {result['pass']:>4}: {result['parts_per_minute']:9.0f} parts/min, "
+        f"{result['api_calls_per_sku']:.2f} API calls/SKU, {result['site_requests_per_part']:.2f} site requests/part, "
+        f"peak {result['peak_rss_mb']:.0f} MB (browser {result['peak_children_rss_mb']:.0f} MB), "
+        f"{result['seconds']:.1f}s"
+    )
+
+
+def child(args):
+    """One pipeline pass against the fake servers, run inside the work directory."""
+    import resource
+    import scraper
+    import ebay_interface
+    import pipeline
+    import metrics
+
+    s = scraper.Scraper(workers=args.workers, headless=True, use_fast_path=args.fast_path)
+    s.URL = args.site + "/oem-parts"
+    interface = ebay_interface.EbayAPIInterface()
+
+    start = time.perf_counter()
+    pipeline.Pipeline(s, interface, reconcile=args.reconcile).run()
+    seconds = time.perf_counter() - start
+
+    summary = metrics.summary()
+    parts = sum(counter["value"] for counter in summary["counters"].get("scraper_parts_total", []))
+    failed = sum(counter["value"] for counter in summary["counters"].get("scraper_parts_total", [])
+                 if counter["labels"].get("status") != "done")
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    result = {
+        "seconds": seconds,
+        "parts": parts,
+        "parts_not_done": failed,
+        "parts_per_minute": parts / seconds * 60 if seconds else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "peak_children_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+        "metrics": summary
+    }
+    with open("result.json", "w") as file:
+        json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark against a fake supplier site and Trading API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Catalog sizes (parts)")
+    parser.add_argument("--parts-per-schematic", type=int, default=25)
+    parser.add_argument("--listed-fraction", type=float, default=0.5, help="Share of parts listed on the fake store")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake site adds to every request")
+    parser.add_argument("--ebay-latency", type=float, default=0.02, help="Seconds the fake Trading API adds to every call")
+    parser.add_argument("--ebay-error-rate", type=float, default=0.0, help="Share of Trading calls answered with a 518 call-limit error")
+    parser.add_argument("--workers", type=int, default=4, help="Browser pages scraping in parallel")
+    parser.add_argument("--fast-path", action="store_true", help="Replay captured table requests after the first visit")
+    parser.add_argument("--passes", type=int, default=2, help="Cold pass plus this many minus one warm passes")
+    parser.add_argument("--output", default=None, help="Save all results to this JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directories (database, logs, metrics)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--site", help=argparse.SUPPRESS)
+    parser.add_argument("--reconcile", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+    else:
+        results = []
+        for size in args.sizes:
+            results += run_size(args, size)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+            print(f"Results written to {args.output}")
@@ -0,0 +1,121 @@
+import sys
+import time
+import argparse
+import database as db
+import refresh_options
+
+"""
+This script runs the tool without the GUI, e.g. from cron or on a headless server.
+
+    python cli.py lookup MPN [MPN ...]     Stock and price from the database
+    python cli.py refresh                  Scrape, price and push eBay revisions (see --help)
+    python cli.py sync-listings            Download the store's active listings and link part IDs
+    python cli.py reprice                  Push prices for every listing from the database, no scraping
+
+Playwright, ebaysdk, NumPy and YAML are only imported by the subcommands that use them,
+so lookups start without loading any of them.
+"""
+
+def lookup(args):
+    found = db.get_parts_many(args.mpns)
+    missing = 0
+    for mpn in args.mpns:
+        part = found.get(mpn)
+        if part is None:
+            print(f"{mpn}: not found")
+            missing += 1
+            continue
+        in_stock = "In Stock" if part[1] == 1 else "Out of Stock"
+        listing = f", eBay ItemID {part[5]}" if part[5] else ""
+        print(f"{mpn}: {in_stock}, ${part[2]}, updated {part[6]}{listing}")
+    return 1 if missing else 0
+
+
+def refresh(args):
+    import scraper
+    import metrics
+    import progress
+
+    s = scraper.Scraper(**refresh_options.scraper_kwargs(args))
+
+    # One progress line per saved batch, at most every few seconds
+    last_print = 0.0
+    def report(event):
+        nonlocal last_print
+        if event["done"] == event["total"] or time.monotonic() - last_print >= args.progress_seconds:
+            last_print = time.monotonic()
+            print(progress.format_event(event).replace("\n", " | "))
+
+    tracker = progress.ProgressTracker(report)
+    s.start_listeners.append(tracker.start)
+    s.result_listeners.append(tracker.update)
+
+    collect_kwargs = refresh_options.collect_kwargs(args)
+
+    if args.no_ebay:
+        metrics.export(s.collect_info(**collect_kwargs))
+        return 0
+
+    import ebay_interface
+    import pipeline
+
+    interface = ebay_interface.EbayAPIInterface(max_workers=args.ebay_workers)
+    updater = pipeline.Pipeline(s, interface, reconcile=args.reconcile, reconcile_hours=args.reconcile_hours)
+    updater.run(**collect_kwargs)
+    return 0
+
+
+def sync_listings(args):
+    import ebay_interface
+
+    interface = ebay_interface.EbayAPIInterface(max_workers=args.ebay_workers)
+    interface.reconcile_if_due(args.reconcile_hours, force=not args.if_due)
+    return 0
+
+
+def reprice(args):
+    import ebay_interface
+
+    interface = ebay_interface.EbayAPIInterface(max_workers=args.ebay_workers)
+    update_list = interface.make_update_list()
+    if args.dry_run or not update_list:
+        return 0
+
+    errorlist = interface.update_ebay_listings(update_list)
+    return 1 if errorlist else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Part scraper and eBay repricer, without the GUI.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    lookup_parser = subcommands.add_parser("lookup", help="Show stock and price of parts from the database")
+    lookup_parser.add_argument("mpns", nargs="+", metavar="MPN")
+    lookup_parser.set_defaults(handler=lookup)
+
+    refresh_parser = subcommands.add_parser("refresh", help="Scrape parts and push price changes to eBay")
+    refresh_options.add_refresh_arguments(refresh_parser, headless=True)
+    refresh_parser.add_argument("--no-ebay", action="store_true", help="Only update the database, don't touch eBay")
+    refresh_parser.add_argument("--reconcile", action="store_true", help="Download all listings this run even if not due")
+    refresh_parser.add_argument("--progress-seconds", type=float, default=10, help="Seconds between progress lines")
+    refresh_parser.set_defaults(handler=refresh)
+
+    sync_parser = subcommands.add_parser("sync-listings", help="Download active eBay listings and link them to parts")
+    sync_parser.add_argument("--if-due", action="store_true", help="Only download if the last sync is older than --reconcile-hours")
+    sync_parser.set_defaults(handler=sync_listings)
+
+    reprice_parser = subcommands.add_parser("reprice", help="Price every listing from the database and push the changes")
+    reprice_parser.add_argument("--dry-run", action="store_true", help="Print the changes without sending them")
+    reprice_parser.set_defaults(handler=reprice)
+
+    for ebay_parser in (refresh_parser, sync_parser, reprice_parser):
+        ebay_parser.add_argument("--ebay-workers", type=int, default=8, help="Concurrent eBay API calls")
+    for ebay_parser in (refresh_parser, sync_parser):
+        ebay_parser.add_argument("--reconcile-hours", type=float, default=24 * 7, help="Full listing download interval")
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    sys.exit(args.handler(args))
@@ -1,6 +1,9 @@
 import sqlite3
-from datetime import date
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
 import json
+import metrics
 
 """
 This script manages a SQLite database for parts inventory.
@@ -8,59 +11,307 @@ It includes functions to create the database, add parts, update parts, remove pa
 retrieve parts, and delete all parts.
 """
 
-def create_database():
-    # Connect to the database (creates a new file if it doesn’t exist)
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
+DB_PATH = "parts_database.db"
+
+# SQLite connections can't be shared between threads, so each thread keeps its own
+_local = threading.local()
+
+
+def get_connection():
+    """Return this thread's shared connection, opening it with WAL and tuned pragmas on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, far fewer fsyncs
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-16000")  # ~16 MB page cache
+        migrate(conn)
+        _local.conn = conn
+    return conn
+
+
+def close_connection():
+    """Close this thread's shared connection, if one is open."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+@contextmanager
+def transaction():
+    """Yield a cursor on the shared connection; commits on success, rolls back on error."""
+    conn = get_connection()
+    with conn:
+        yield conn.cursor()
+
+
+def parse_instructions(value):
+    try:
+        return json.loads(value)  # Parse JSON string to list
+    except json.JSONDecodeError:
+        return []  # Fallback to empty list on error
 
-    # Create the table
+
+def create_schema(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schematics (
+            SchematicID INTEGER PRIMARY KEY,
+            Path TEXT NOT NULL UNIQUE  -- JSON list of navigation steps, shared by every part on the schematic
+        )
+    ''')
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS parts (
             MPN TEXT PRIMARY KEY,
             "In-Stock" INTEGER NOT NULL,  -- 0 for False, 1 for True
             Price REAL NOT NULL,
             Brand TEXT NOT NULL,
-            Instructions TEXT NOT NULL,  -- Stores JSON string of list, e.g., "[1,2,3]"
+            SchematicID INTEGER NOT NULL REFERENCES schematics(SchematicID),
             ID INTEGER DEFAULT NULL,
             Date TEXT NOT NULL
         )
     ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parts_id ON parts(ID)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parts_date ON parts(Date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parts_brand ON parts(Brand)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_parts_schematic ON parts(SchematicID)')
+
+
+def migrate_v1(cursor):
+    """Move the Instructions JSON out of parts into the schematics table and add indexes."""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(parts)")]
+    if "Instructions" not in columns:
+        # New database (or already normalized), just make sure the schema exists
+        create_schema(cursor)
+        return
+
+    cursor.execute("ALTER TABLE parts RENAME TO parts_old")
+    create_schema(cursor)
+
+    rows = cursor.execute('''
+        SELECT MPN, "In-Stock", Price, Brand, Instructions, ID, Date FROM parts_old
+    ''').fetchall()
+    for mpn, in_stock, price, brand, instructions, part_id, part_date in rows:
+        # Re-encode so equal paths with different JSON spacing share one schematic
+        schematic_id = get_schematic_id(cursor, parse_instructions(instructions))
+        cursor.execute('''
+            INSERT INTO parts (MPN, "In-Stock", Price, Brand, SchematicID, ID, Date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (mpn, in_stock, price, brand, schematic_id, part_id, part_date))
+
+    cursor.execute("DROP TABLE parts_old")
+    print(f"Migrated {len(rows)} parts to the normalized schema")
+
+
+def migrate_v2(cursor):
+    """Add the append-only price/stock history and the runs it is grouped by."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS runs (
+            RunNo INTEGER PRIMARY KEY AUTOINCREMENT,  -- Increases with every run, used for "since run X"
+            RunID TEXT NOT NULL UNIQUE,
+            Started TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_history (
+            MPN TEXT NOT NULL,
+            Day INTEGER NOT NULL,  -- Days since 1970-01-01
+            RunNo INTEGER NOT NULL,
+            PriceCents INTEGER,  -- NULL when the site listed no price
+            InStock INTEGER  -- 0 for False, 1 for True
+        )
+    ''')
+    # Covering index: per-part history queries never touch the table itself
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_mpn_day ON price_history(MPN, Day, PriceCents, InStock, RunNo)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_run ON price_history(RunNo)')
+
+
+def migrate_v3(cursor):
+    """Add the captured table requests used by the HTTP fast path."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fast_path_requests (
+            SchematicID INTEGER PRIMARY KEY REFERENCES schematics(SchematicID),
+            Request TEXT NOT NULL,  -- JSON: method, url, headers, body
+            Captured TEXT NOT NULL
+        )
+    ''')
+
+
+def migrate_v4(cursor):
+    """Remember the schematic page URL the dropdowns last led to."""
+    cursor.execute("ALTER TABLE schematics ADD COLUMN URL TEXT DEFAULT NULL")
+
+
+def migrate_v5(cursor):
+    """Keep the store's active eBay listings in the database instead of ebay_listings.json."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS listings (
+            ItemID TEXT PRIMARY KEY,
+            MPN TEXT,  -- NULL until GetItem has told us the Manufacturer Part Number
+            Price REAL,  -- Current eBay price
+            Currency TEXT,
+            LastSeen TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_listings_mpn ON listings(MPN)')
+
+
+def migrate_v6(cursor):
+    """Remember the last price we successfully pushed to each listing."""
+    cursor.execute("ALTER TABLE listings ADD COLUMN PushedPrice REAL DEFAULT NULL")
+    cursor.execute("ALTER TABLE listings ADD COLUMN PushedAt TEXT DEFAULT NULL")
+
+
+def migrate_v7(cursor):
+    """Add the per-run checkpoints that --resume reads."""
+    # One row per part per scrape run, written as soon as the part is finished
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            RunID TEXT NOT NULL,
+            MPN TEXT NOT NULL,
+            Status TEXT NOT NULL,  -- done, not_found or failed
+            Date TEXT NOT NULL,
+            PRIMARY KEY (RunID, MPN)
+        )
+    ''')
+
+
+# Applied in order; PRAGMA user_version records how many have run on a database file
+MIGRATIONS = [migrate_v1, migrate_v2, migrate_v3, migrate_v4, migrate_v5, migrate_v6, migrate_v7]
 
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+
+def migrate(conn):
+    """Upgrade the database file in place to the latest schema version."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+    for number, step in enumerate(MIGRATIONS, start=1):
+        # Take the write lock before reading the version, so two connections opened at
+        # once wait for each other instead of both running (or deadlocking on) the same step
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= number:
+                conn.rollback()
+                continue
+            step(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def get_schematic_id(cursor, instructions):
+    """Return the key for an instruction path, adding it to the schematics table if it's new."""
+    path = json.dumps(instructions)
+    cursor.execute("INSERT OR IGNORE INTO schematics (Path) VALUES (?)", (path,))
+    cursor.execute("SELECT SchematicID FROM schematics WHERE Path = ?", (path,))
+    return cursor.fetchone()[0]
+
+
+def find_schematic_id(cursor, instructions):
+    """Return the key for an instruction path, or None if no part uses it."""
+    cursor.execute("SELECT SchematicID FROM schematics WHERE Path = ?", (json.dumps(instructions),))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def load_paths(conn, schematic_ids=None):
+    """Decode schematic paths once per schematic, not once per part. None loads all of them."""
+    if schematic_ids is None:
+        rows = conn.execute("SELECT SchematicID, Path FROM schematics").fetchall()
+    else:
+        schematic_ids = list(set(schematic_ids))
+        rows = []
+        for start in range(0, len(schematic_ids), 500):
+            chunk = schematic_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows += conn.execute(f"SELECT SchematicID, Path FROM schematics WHERE SchematicID IN ({placeholders})", chunk).fetchall()
+    return {schematic_id: parse_instructions(path) for schematic_id, path in rows}
+
+
+# Parts columns in the order every reader unpacks them; index 4 is the schematic key
+PART_QUERY = 'SELECT MPN, "In-Stock", Price, Brand, SchematicID, ID, Date FROM parts'
+
+
+def decode_part(part, paths):
+    """Turn a PART_QUERY row into the public tuple with the decoded instruction list at index 4."""
+    return (part[0], part[1], part[2], part[3], paths.get(part[4], []), part[5], part[6])
+
+
+def create_database():
+    # Create the tables (the database file is created and migrated if it doesn’t exist)
+    with transaction() as cursor:
+        create_schema(cursor)
 
     print("Database and table created successfully!")
 
 
+@metrics.timed("db_write_seconds", operation="update_ID")
 def update_ID(mpn, part_id):
     try:
-        conn = sqlite3.connect("parts_database.db")
-        cursor = conn.cursor()
-
-        # Update the ID for the part with the given MPN
-        cursor.execute('''
-            UPDATE parts SET ID = ? WHERE MPN = ?
-        ''', (part_id, mpn))
-
-        # Check if any rows were affected
-        if cursor.rowcount == 0:
-            raise Exception(f"No part found with MPN {mpn}")
+        with transaction() as cursor:
+            # Update the ID for the part with the given MPN
+            cursor.execute('''
+                UPDATE parts SET ID = ? WHERE MPN = ?
+            ''', (part_id, mpn))
 
-        conn.commit()
-        conn.close()
+            # Check if any rows were affected
+            if cursor.rowcount == 0:
+                raise Exception(f"No part found with MPN {mpn}")
 
         print(f"ID for part {mpn} updated to {part_id} successfully!")
-        
+
     except Exception as e:
         print(f"Failed to update ID for {mpn}: {str(e)}")
         raise
 
 
+@metrics.timed("db_write_seconds", operation="update_ids_many")
+def update_ids_many(pairs):
+    """
+    Set eBay IDs for many parts in a single transaction.
+
+    Args:
+        pairs: Iterable of (mpn, part_id).
+
+    Returns:
+        Number of parts updated; MPNs that aren't in the database are skipped.
+    """
+    rows = [(part_id, mpn) for mpn, part_id in pairs]
+    with transaction() as cursor:
+        cursor.executemany('UPDATE parts SET ID = ? WHERE MPN = ?', rows)
+        updated = cursor.rowcount
+
+    print(f"Updated IDs for {updated} of {len(rows)} parts")
+    return updated
+
+
+def rename_part(cursor, mpn, new_mpn, today):
+    """Move a superseded part to its new MPN; today=None keeps the existing Date."""
+    cursor.execute("SELECT 1 FROM parts WHERE MPN = ?", (new_mpn,))
+    if cursor.fetchone():
+        # The replacement is already tracked (often on the same schematic): merge into its row,
+        # keeping the old part's eBay ID if the replacement has none
+        cursor.execute("""
+            UPDATE parts SET ID = COALESCE(ID, (SELECT ID FROM parts WHERE MPN = ?)), Date = COALESCE(?, Date)
+            WHERE MPN = ?
+        """, (mpn, today, new_mpn))
+    else:
+        # Copy existing record to new MPN with updated Date
+        cursor.execute("""
+            INSERT INTO parts (MPN, "In-Stock", Price, Brand, SchematicID, ID, Date)
+            SELECT ?, "In-Stock", Price, Brand, SchematicID, ID, COALESCE(?, Date)
+            FROM parts WHERE MPN = ?
+        """, (new_mpn, today, mpn))
+    cursor.execute("DELETE FROM parts WHERE MPN = ?", (mpn,))
+
+
+@metrics.timed("db_write_seconds", operation="update_part")
 def update_part(mpn: str, in_stock: int = None, price: float = None, new_mpn: str = None):
     """
     Update a part's In-Stock, Price, Date, and optionally MPN in the database.
-    
+
     Args:
         mpn: Current MPN of the part.
         in_stock: 1 for True, 0 for False, None to skip.
@@ -68,159 +319,129 @@ def update_part(mpn: str, in_stock: int = None, price: float = None, new_mpn: st
         new_mpn: New MPN if the part number has changed, None to skip.
     """
     try:
-        conn = sqlite3.connect("parts_database.db")
-        cursor = conn.cursor()
-
-        # Get current date
-        today = date.today().strftime("%Y-%m-%d")
-
-        if new_mpn and new_mpn != mpn:
-            # Copy existing record to new MPN with updated Date, then delete old record
-            cursor.execute("""
-                INSERT INTO parts (MPN, "In-Stock", Price, Brand, Instructions, ID, Date)
-                SELECT ?, "In-Stock", Price, Brand, Instructions, ID, ?
-                FROM parts WHERE MPN = ?
-            """, (new_mpn, today, mpn))
-            cursor.execute("DELETE FROM parts WHERE MPN = ?", (mpn,))
-            mpn = new_mpn  # Update mpn for further updates
-
-        updates = ["Date = ?"]  # Always update Date
-        values = [today]
-        if in_stock is not None:
-            updates.append('"In-Stock" = ?')
-            values.append(in_stock)
-        if price is not None:
-            updates.append('Price = ?')
-            values.append(price)
-
-        if updates:
-            query = f'UPDATE parts SET {", ".join(updates)} WHERE MPN = ?'
-            values.append(mpn)
-            cursor.execute(query, values)
-
-        conn.commit()
-        conn.close()
+        update_parts_many([(mpn, in_stock, price, new_mpn)])
+
+        print(f"Part {new_mpn or mpn} updated successfully!")
 
-        print(f"Part {mpn} updated successfully!")
-        
     except Exception as e:
         print(f"Database update failed for {mpn}: {str(e)}")
         raise
 
 
-def add_part(mpn, in_stock, price, brand, instructions, part_id):
-    # Connect to the database
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
+@metrics.timed("db_write_seconds", operation="update_parts_many")
+def update_parts_many(updates, stamp_date=True):
+    """
+    Apply many part updates in a single transaction.
 
-    # Get today's date
-    today = date.today().strftime("%Y-%m-%d")
+    Args:
+        updates: Iterable of (mpn, in_stock, price, new_mpn) with the same meaning
+                 as the arguments of update_part; None skips a field.
+        stamp_date: Set Date to today; False keeps each part's Date (e.g. when the
+                    data comes from an old snapshot rather than the site).
+    """
+    today = date.today().strftime("%Y-%m-%d") if stamp_date else None
 
-    # Convert instructions list to JSON string
-    instructions_json = json.dumps(instructions)
+    rows = []
+    with transaction() as cursor:
+        for mpn, in_stock, price, new_mpn in updates:
+            if new_mpn and new_mpn != mpn:
+                rename_part(cursor, mpn, new_mpn, today)
+                mpn = new_mpn  # Update mpn for further updates
+            rows.append((today, in_stock, price, mpn))
 
-    # Insert the part into the table
-    cursor.execute('''
-        INSERT INTO parts (MPN, "In-Stock", Price, Brand, Instructions, ID, Date)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (mpn, in_stock, price, brand, instructions_json, part_id, today))
+        # None leaves Date / In-Stock / Price unchanged
+        cursor.executemany('''
+            UPDATE parts SET Date = COALESCE(?, Date), "In-Stock" = COALESCE(?, "In-Stock"), Price = COALESCE(?, Price)
+            WHERE MPN = ?
+        ''', rows)
+
+    return len(rows)
 
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+
+@metrics.timed("db_write_seconds", operation="add_part")
+def add_part(mpn, in_stock, price, brand, instructions, part_id):
+    # Get today's date
+    today = date.today().strftime("%Y-%m-%d")
+
+    # Insert the part into the table, sharing the schematic row with other parts on the same page
+    with transaction() as cursor:
+        schematic_id = get_schematic_id(cursor, instructions)
+        cursor.execute('''
+            INSERT INTO parts (MPN, "In-Stock", Price, Brand, SchematicID, ID, Date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (mpn, in_stock, price, brand, schematic_id, part_id, today))
 
     print(f"Part {mpn} added successfully!")
 
 
+@metrics.timed("db_write_seconds", operation="remove_part")
 def remove_part(mpn):
-    # Connect to the database
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
-
     # Delete the part from the table
-    cursor.execute('''
-        DELETE FROM parts WHERE MPN = ?
-    ''', (mpn,))
-
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute('''
+            DELETE FROM parts WHERE MPN = ?
+        ''', (mpn,))
 
     print(f"Part {mpn} removed successfully!")
 
 
 def get_all_parts():
-    # Connect to the database
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
-
     # Retrieve all parts from the table
-    cursor.execute('SELECT * FROM parts')
-    parts = cursor.fetchall()
+    conn = get_connection()
+    parts = conn.execute(PART_QUERY).fetchall()
+    paths = load_paths(conn)
 
-    # Close the connection
-    conn.close()
-
-    # Convert Instructions JSON string to list
-    parsed_parts = []
-    for part in parts:
-        try:
-            instructions = json.loads(part[4])  # Parse JSON string to list
-        except json.JSONDecodeError:
-            instructions = []  # Fallback to empty list on error
-        parsed_parts.append((part[0], part[1], part[2], part[3], instructions, part[5], part[6]))
-    
-    return parsed_parts
+    return [decode_part(part, paths) for part in parts]
 
 
 def get_part(mpn):
-    # Connect to the database
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
-
     # Retrieve the part from the table
-    cursor.execute('SELECT * FROM parts WHERE MPN = ?', (mpn,))
-    part = cursor.fetchone()
-
-    # Close the connection
-    conn.close()
+    conn = get_connection()
+    part = conn.execute(PART_QUERY + ' WHERE MPN = ?', (mpn,)).fetchone()
 
-    # Parse Instructions JSON string to list
     if part:
-        try:
-            instructions = json.loads(part[4])  # Parse JSON string to list
-        except json.JSONDecodeError:
-            instructions = []  # Fallback to empty list on error
-        return (part[0], part[1], part[2], part[3], instructions, part[5], part[6])
-    
+        return decode_part(part, load_paths(conn, [part[4]]))
+
     return None
 
 
-def make_parts_list():
-    # Connect to the database
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
+def get_parts_many(mpns):
+    """
+    Look up many parts at once.
 
-    # Retrieve all parts from the table
-    cursor.execute('SELECT * FROM parts')
-    parts = cursor.fetchall()
+    Returns:
+        Dict of MPN -> part tuple (same layout as get_part); missing MPNs are left out.
+    """
+    mpns = list({mpn for mpn in mpns if mpn is not None})
+    conn = get_connection()
+
+    parts = []
+    # Stay below SQLite's bound-parameter limit
+    for start in range(0, len(mpns), 500):
+        chunk = mpns[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        parts += conn.execute(PART_QUERY + f' WHERE MPN IN ({placeholders})', chunk).fetchall()
 
-    # Close the connection
-    conn.close()
+    paths = load_paths(conn, [part[4] for part in parts])
+    return {part[0]: decode_part(part, paths) for part in parts}
+
+
+def make_parts_list():
+    # Retrieve all parts from the table
+    conn = get_connection()
+    parts = conn.execute(PART_QUERY).fetchall()
+    paths = load_paths(conn)
 
     # Create a list of dictionaries for each part
     parts_list = []
     for part in parts:
-        try:
-            instructions = json.loads(part[4])  # Parse JSON string to list
-        except json.JSONDecodeError:
-            instructions = []  # Fallback to empty list on error
         part_dict = {
             "MPN": part[0],
             "In-Stock": bool(part[1]),  # Convert to boolean
             "Price": part[2],
             "Brand": part[3],
-            "Instructions": instructions,  # Store as list
+            "Instructions": paths.get(part[4], []),  # Decoded list, shared by parts on the same schematic
+            "SchematicID": part[4],
             "ID": part[5],
             "Date": part[6]
         }
@@ -229,17 +450,297 @@ def make_parts_list():
     return parts_list
 
 
-def delete_all_parts():
-    # Connect to the database
-    conn = sqlite3.connect("parts_database.db")
-    cursor = conn.cursor()
+def add_checkpoint(run_id, mpn, status):
+    add_checkpoints_many(run_id, [(mpn, status)])
 
-    # Delete all parts from the table
-    cursor.execute('DELETE FROM parts')
 
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+@metrics.timed("db_write_seconds", operation="add_checkpoints_many")
+def add_checkpoints_many(run_id, outcomes):
+    """Record (mpn, status) outcomes for a run in a single transaction."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as cursor:
+        cursor.executemany('''
+            INSERT OR REPLACE INTO checkpoints (RunID, MPN, Status, Date)
+            VALUES (?, ?, ?, ?)
+        ''', [(run_id, mpn, status, now) for mpn, status in outcomes])
+
+
+def get_finished_parts(run_id):
+    """Return the set of MPNs a run has finished; failed parts are left out so a resume retries them."""
+    cursor = get_connection().execute("SELECT MPN FROM checkpoints WHERE RunID = ? AND Status != 'failed'", (run_id,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def get_latest_run_id():
+    cursor = get_connection().execute("SELECT RunID FROM checkpoints ORDER BY Date DESC LIMIT 1")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def get_schematic_url(instructions):
+    """Return the remembered page URL for an instruction path, or None."""
+    cursor = get_connection().execute("SELECT URL FROM schematics WHERE Path = ?", (json.dumps(instructions),))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+@metrics.timed("db_write_seconds", operation="save_schematic_url")
+def save_schematic_url(instructions, url):
+    """Remember (or with url=None, forget) the page URL an instruction path leads to."""
+    with transaction() as cursor:
+        schematic_id = get_schematic_id(cursor, instructions)
+        cursor.execute("UPDATE schematics SET URL = ? WHERE SchematicID = ?", (url, schematic_id))
+
+
+@metrics.timed("db_write_seconds", operation="save_fast_path_request")
+def save_fast_path_request(instructions, request):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as cursor:
+        schematic_id = get_schematic_id(cursor, instructions)
+        cursor.execute('''
+            INSERT OR REPLACE INTO fast_path_requests (SchematicID, Request, Captured)
+            VALUES (?, ?, ?)
+        ''', (schematic_id, json.dumps(request), now))
+
+
+def get_fast_path_request(instructions):
+    """Return the captured table request for an instruction path, or None."""
+    cursor = get_connection().cursor()
+    schematic_id = find_schematic_id(cursor, instructions)
+    if schematic_id is None:
+        return None
+    cursor.execute("SELECT Request FROM fast_path_requests WHERE SchematicID = ?", (schematic_id,))
+    row = cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+
+@metrics.timed("db_write_seconds", operation="delete_fast_path_request")
+def delete_fast_path_request(instructions):
+    with transaction() as cursor:
+        schematic_id = find_schematic_id(cursor, instructions)
+        cursor.execute("DELETE FROM fast_path_requests WHERE SchematicID = ?", (schematic_id,))
+
+
+def get_listing_mpns():
+    """Return ItemID -> MPN for every listing whose MPN is already known."""
+    cursor = get_connection().execute("SELECT ItemID, MPN FROM listings WHERE MPN IS NOT NULL")
+    return dict(cursor.fetchall())
+
+
+def get_listings():
+    """Return (ItemID, MPN, Price) for every active listing."""
+    return get_connection().execute("SELECT ItemID, MPN, Price FROM listings").fetchall()
+
+
+def get_listing_prices(mpns=None):
+    """
+    Join listings to their parts in one query.
+
+    Args:
+        mpns: Only return listings for these MPNs, None for every listing.
+
+    Returns:
+        List of (ItemID, MPN, eBay price, supplier price); the supplier price is None
+        when the listing's MPN isn't in the parts table.
+    """
+    query = '''
+        SELECT l.ItemID, l.MPN, l.Price, p.Price
+        FROM listings l LEFT JOIN parts p ON p.MPN = l.MPN
+    '''
+    conn = get_connection()
+    if mpns is None:
+        return conn.execute(query).fetchall()
+
+    mpns = list(set(mpns))
+    rows = []
+    for start in range(0, len(mpns), 500):
+        chunk = mpns[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        rows += conn.execute(query + f" WHERE l.MPN IN ({placeholders})", chunk).fetchall()
+    return rows
+
+
+@metrics.timed("db_write_seconds", operation="record_pushed_prices")
+def record_pushed_prices(pairs):
+    """
+    Record prices that eBay accepted.
+
+    Price (our best knowledge of the live price) follows the push, so later update
+    lists can be computed without downloading the listings again.
+
+    Args:
+        pairs: Iterable of (ItemID, price).
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as cursor:
+        cursor.executemany(
+            "UPDATE listings SET Price = ?, PushedPrice = ?, PushedAt = ? WHERE ItemID = ?",
+            [(price, price, now, item_id) for item_id, price in pairs]
+        )
+
+
+def get_last_listing_sync():
+    """Return when the listings were last downloaded from eBay (a datetime), or None if never."""
+    row = get_connection().execute("SELECT MAX(LastSeen) FROM listings").fetchone()
+    if not row or not row[0]:
+        return None
+    return datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S.%f")
+
+
+@metrics.timed("db_write_seconds", operation="sync_listings")
+def sync_listings(listings):
+    """
+    Replace the listings table with the latest set of active listings.
+
+    Args:
+        listings: Iterable of dicts with ItemID, MPN, Price and Currency.
+
+    Returns:
+        Number of listings removed because they are no longer active.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")  # Sub-second so back-to-back syncs still differ
+    rows = [(listing['ItemID'], listing['MPN'], listing['Price'], listing['Currency'], now) for listing in listings]
+
+    with transaction() as cursor:
+        cursor.executemany('''
+            INSERT INTO listings (ItemID, MPN, Price, Currency, LastSeen)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(ItemID) DO UPDATE SET
+                MPN = COALESCE(excluded.MPN, MPN),
+                Price = excluded.Price,
+                Currency = excluded.Currency,
+                LastSeen = excluded.LastSeen
+        ''', rows)
+        # Anything not seen in this sync has ended
+        cursor.execute("DELETE FROM listings WHERE LastSeen < ?", (now,))
+        removed = cursor.rowcount
+
+    return removed
+
+
+EPOCH = date(1970, 1, 1)
+
+
+def to_cents(price):
+    return None if price is None else int(round(price * 100))
+
+
+def to_day(day):
+    return (day - EPOCH).days
+
+
+def get_run_number(cursor, run_id):
+    """Return the increasing number for a run, registering the run if it's new."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute("INSERT OR IGNORE INTO runs (RunID, Started) VALUES (?, ?)", (run_id, now))
+    cursor.execute("SELECT RunNo FROM runs WHERE RunID = ?", (run_id,))
+    return cursor.fetchone()[0]
+
+
+@metrics.timed("db_write_seconds", operation="add_price_history_many")
+def add_price_history_many(run_id, observations):
+    """
+    Append the price and stock observed for a batch of parts.
+
+    Only observations that differ from the part's latest history row are stored,
+    so the table is a log of changes (the first observation of a part always counts).
+
+    Args:
+        run_id: Run the observations belong to.
+        observations: Iterable of (mpn, price, in_stock); price may be None.
+
+    Returns:
+        Number of rows appended.
+    """
+    observations = [(mpn, to_cents(price), in_stock) for mpn, price, in_stock in observations]
+    if not observations:
+        return 0
+    today = to_day(date.today())
+
+    with transaction() as cursor:
+        run_no = get_run_number(cursor, run_id)
+
+        # Latest recorded (price, stock) per part in this batch
+        mpns = list({mpn for mpn, _, _ in observations})
+        latest = {}
+        for start in range(0, len(mpns), 500):
+            chunk = mpns[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT MPN, PriceCents, InStock FROM price_history h
+                WHERE MPN IN ({placeholders})
+                AND rowid = (SELECT MAX(rowid) FROM price_history WHERE MPN = h.MPN)
+            ''', chunk)
+            for mpn, cents, in_stock in cursor.fetchall():
+                latest[mpn] = (cents, in_stock)
+
+        rows = [(mpn, today, run_no, cents, in_stock)
+                for mpn, cents, in_stock in observations
+                if latest.get(mpn) != (cents, in_stock)]
+        cursor.executemany('''
+            INSERT INTO price_history (MPN, Day, RunNo, PriceCents, InStock)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+
+    return len(rows)
+
+
+def get_changed_parts(since_run_id):
+    """
+    Return the set of MPNs whose price changed in any run after the given one.
+
+    History rows are also written for stock-only changes and first sightings, so each
+    price is compared with the part's previous known price; missing prices are skipped.
+    """
+    cursor = get_connection().execute('''
+        WITH prices AS (
+            SELECT MPN, RunNo, PriceCents,
+                   LAG(PriceCents) OVER (PARTITION BY MPN ORDER BY Day, RunNo) AS Previous
+            FROM price_history
+            WHERE PriceCents IS NOT NULL
+              AND MPN IN (SELECT MPN FROM price_history WHERE RunNo > (SELECT RunNo FROM runs WHERE RunID = ?))
+        )
+        SELECT DISTINCT MPN FROM prices
+        WHERE RunNo > (SELECT RunNo FROM runs WHERE RunID = ?) AND Previous IS NOT NULL AND PriceCents != Previous
+    ''', (since_run_id, since_run_id))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def get_price_volatility(days=90):
+    """
+    Summarise how much each part's price moved over the last `days` days.
+
+    Returns:
+        Dict of MPN -> (number of price changes, standard deviation of price in dollars).
+        Stock-only changes don't count; the first price in the window is compared with the
+        last one before it.
+    """
+    since = to_day(date.today()) - days
+    cursor = get_connection().execute('''
+        WITH prices AS (
+            SELECT MPN, Day, PriceCents,
+                   LAG(PriceCents) OVER (PARTITION BY MPN ORDER BY Day, RunNo) AS Previous
+            FROM price_history
+            WHERE PriceCents IS NOT NULL
+        )
+        SELECT MPN, SUM(Previous IS NOT NULL AND PriceCents != Previous), AVG(PriceCents), AVG(PriceCents * PriceCents)
+        FROM prices
+        WHERE Day >= ?
+        GROUP BY MPN
+    ''', (since,))
+
+    volatility = {}
+    for mpn, changes, mean, mean_square in cursor.fetchall():
+        variance = max(mean_square - mean * mean, 0)
+        volatility[mpn] = (changes, variance ** 0.5 / 100)
+    return volatility
+
+
+@metrics.timed("db_write_seconds", operation="delete_all_parts")
+def delete_all_parts():
+    # Delete all parts from the table
+    with transaction() as cursor:
+        cursor.execute('DELETE FROM parts')
 
     print("All parts removed successfully!")
 
@@ -254,9 +755,9 @@ if __name__ == "__main__":
     print(get_part("0470-877"))
     delete_all_parts()
     print(f'All Parts Remaining In Database: {get_all_parts()}')
-    print('Thank you for using the parts database script!') 
-# This showcases that the database's functionality through a 
+    print('Thank you for using the parts database script!')
+# This showcases that the database's functionality through a
 # series of operations: creating the database, adding parts, updating parts,
 # retrieving parts, and deleting all parts. The script is designed to be run
 # as a standalone program, and it will create a database file named "parts_database.db"
-# The numbers here are example values and don't actually work with the scraper.
\ No newline at end of file
+# The numbers here are example values and don't actually work with the scraper.
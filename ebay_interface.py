@@ -1,11 +1,45 @@
-from ebaysdk.trading import Connection as Trading
-from ebaysdk.exception import ConnectionError
 import yaml
-import json
+import time
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import database as db
+import metrics
+from throttle import RateLimiter
+from pricing import PricingEngine
+
+# ReviseInventoryStatus accepts at most four listings per call
+REVISE_BATCH_SIZE = 4
+
+# eBay ErrorCodes and HTTP statuses that mean slow down and try again (518: call usage limit)
+RETRYABLE_ERROR_CODES = {"518"}
+RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+
+
+def error_codes(error):
+    """Return the set of eBay ErrorCodes in an ebaysdk ConnectionError's response."""
+    try:
+        errors = error.response.dict().get("Errors", [])
+    except Exception:
+        return set()  # No response, or not a parsable Trading response
+    if isinstance(errors, dict):
+        errors = [errors]
+    return {str(item.get("ErrorCode")) for item in errors if isinstance(item, dict)}
+
+
+def is_retryable(error):
+    """True for eBay call limits, overloaded/unavailable HTTP responses and network timeouts."""
+    import requests
+
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if getattr(getattr(error, "response", None), "status_code", None) in RETRYABLE_HTTP_STATUSES:
+        return True
+    return bool(error_codes(error) & RETRYABLE_ERROR_CODES)
+
 
 class EbayAPIInterface:
-    def __init__(self):
+    def __init__(self, max_workers=8, calls_per_second=None, max_retries=4, backoff=1.0):
         try:
             with open("ebay.yaml", "r") as file:
                 self.config = yaml.safe_load(file)
@@ -14,101 +48,218 @@ class EbayAPIInterface:
             print("eBay configuration file not found. Please ensure 'ebay_config.yaml' exists.")
             self.config = None
 
+        self.max_workers = max_workers  # Concurrent GetItem calls
+        self.limiter = RateLimiter(calls_per_second)  # Across all threads, None for no limit
+        self.max_retries = max_retries
+        self.backoff = backoff  # Seconds before the first retry, doubled each time
+        self.local = threading.local()  # One reusable Trading connection per thread
+        self.unmatched_listings = []  # (ItemID, MPN) of listings make_update_list couldn't match to a part
+        self.pricing = PricingEngine.from_file("pricing.yaml")  # Today's rules unless pricing.yaml overrides them
+
+    def connect(self):
+        """
+        Build a Trading API connection from the config.
+
+        Optional `domain` and `https` keys in ebay.yaml point it at another endpoint,
+        e.g. a local fake Trading server for testing.
+        """
+        # Imported on first connection, so pricing-only work (e.g. cli.py reprice --dry-run) doesn't need ebaysdk
+        from ebaysdk.trading import Connection as Trading
+
+        options = {}
+        if self.config.get("domain"):
+            options["domain"] = self.config["domain"]
+        if "https" in self.config:
+            options["https"] = self.config["https"]
+
+        return Trading(
+            appid=self.config["appid"],
+            devid=self.config["devid"],
+            certid=self.config["certid"],
+            token=self.config["token"],
+            config_file=None,
+            siteid="0",
+            **options
+        )
+
+    def api(self):
+        """Return this thread's Trading connection, so its HTTP session is reused across calls."""
+        api = getattr(self.local, "api", None)
+        if api is None:
+            api = self.connect()
+            self.local.api = api
+        return api
+
+    def execute(self, verb, request):
+        """Run an API call, backing off and retrying when eBay reports call limits or is unavailable."""
+        import requests
+        from ebaysdk.exception import ConnectionError
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            try:
+                with metrics.timer("ebay_call_seconds", verb=verb):
+                    return self.api().execute(verb, request).dict()
+            except (ConnectionError, requests.exceptions.RequestException) as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    metrics.increment("ebay_failures_total", verb=verb)
+                    raise
+                metrics.increment("ebay_retries_total", verb=verb)
+                delay = self.backoff * 2 ** attempt
+                print(f"{verb} throttled or unavailable ({e}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+
 
     def calculate_price(self, rm_price):
-        def round_to_nearest(num, base=5):
-            # Format of ###.95
-            return (base * round(num / base)) - 0.02
-        
-        total = rm_price + 0.3  # 30 cent transaction fee
-        if total < 75:
-            total += 7
-
-        if total < 25:
-            total = (total + 5) / 0.88
-        elif total <= 50:
-            total = (total + 10) / 0.88
-        elif total <= 100:
-            total = (total * 1.3) / 0.88
-        elif total <= 200:
-            total = (total * 1.35) / 0.88
-        elif total > 200:
-            total = (total * 1.4) / 0.88
-
-        total = round_to_nearest(total, 5)
-
-        return total
-            
+        # Fees, shipping, margin tiers and ###.98 rounding live in pricing.PricingEngine
+        return self.pricing.price_one(rm_price)
+
 
     def make_update_list(self):
-        with open("ebay_listings.json", "r") as file:
-            data = json.load(file)
-        update_list = []
+        """
+        Price every listing against its part in one pass and return the listings whose price should change.
+
+        The eBay price compared against is the last downloaded or last successfully pushed
+        price, so this doesn't need a fresh listing download (see reconcile_if_due).
+
+        Returns:
+            List of (ItemID, new_price). Listings with no matching part in the database
+            are kept in self.unmatched_listings as (ItemID, MPN) instead.
+        """
+        rows = db.get_listing_prices()
+        self.unmatched_listings = [(part_id, mpn) for part_id, mpn, _, rm_price in rows if rm_price is None]
 
-        for item in data:
-            part_id = item.get('ItemID')
-            mpn = item.get('ItemSpecifics', [])[0] if item.get('ItemSpecifics') else None
-            our_price = item.get('Price', {}).get('Value', 0)
+        update_list = self.price_listings(rows)
 
-            row = db.get_part(mpn=mpn)
-            rm_price = row[2]
-            total = self.calculate_price(rm_price)
-            if total != our_price:
+        if self.unmatched_listings:
+            print(f"{len(self.unmatched_listings)} listing(s) have no matching part in the database:")
+            for part_id, mpn in self.unmatched_listings:
+                print(f"ItemID: {part_id}, MPN: {mpn}")
+
+        print(f'Finished Update List: {len(update_list)} of {len(rows)} listings need a new price')
+        return update_list
+
+    def price_listings(self, rows):
+        """
+        Price (ItemID, MPN, eBay price, supplier price) rows and return (ItemID, new_price)
+        for those whose eBay price is off. Rows without a supplier price are skipped.
+        """
+        matched = [row for row in rows if row[3] is not None]
+
+        # Price every matched listing in one vectorized pass
+        totals = self.pricing.price([rm_price for _, _, _, rm_price in matched])
+
+        update_list = []
+        for (part_id, mpn, our_price, rm_price), total in zip(matched, totals):
+            total = float(total)
+            if our_price is None or round(total, 2) != round(our_price, 2):
                 update_list.append((part_id, total))
                 print(f"ItemID: {part_id}, MPN: {mpn}, RM Price: {rm_price}\n eBay Price: {our_price}\n New Price: {total}")
 
-        print('Finished Update List')
         return update_list
 
 
-    def update_ebay_listings(self, change_list: list):
+    def simulate_pricing(self, candidate_rules):
+        """
+        Apply a candidate rule set (same format as pricing.DEFAULT_RULES) to every matched listing.
+
+        Returns:
+            Dict with how many listings would change price and the total margin delta
+            against what they sell for now.
+        """
+        rows = [row for row in db.get_listing_prices() if row[3] is not None]
+        rm_prices = [rm_price for _, _, _, rm_price in rows]
+
+        # Listings without a known eBay price are compared against today's rules
+        current = self.pricing.price(rm_prices)
+        current_prices = [our_price if our_price is not None else float(price)
+                          for (_, _, our_price, _), price in zip(rows, current)]
+
+        report = self.pricing.simulate(candidate_rules, rm_prices, current_prices)
+        print(f"{report['changed']} of {report['listings']} listings would change price, "
+              f"margin delta ${report['margin_delta']:.2f} (${report['average_margin_delta']:.2f} per sale)")
+        return report
+
+    def revise_batch(self, batch):
+        """
+        Send up to REVISE_BATCH_SIZE price changes in one ReviseInventoryStatus call.
+
+        Returns:
+            List of ((ItemID, new_price), error) for the listings that failed. A batch
+            rejected for one of its listings is split up so one bad listing doesn't fail
+            the others; call limits and outages fail the whole batch, for a later retry.
+        """
+        request = {
+            'InventoryStatus': [{'ItemID': itemID, 'StartPrice': new_price} for itemID, new_price in batch]
+        }
+
+        try:
+            self.execute('ReviseInventoryStatus', request)
+            for itemID, new_price in batch:
+                print(f"Updated ItemID {itemID} to new price: {new_price}")
+
+        except Exception as e:
+            if is_retryable(e):
+                # Out of retries on a call limit or outage: splitting would only add calls
+                return [(item, str(e)) for item in batch]
+            if len(batch) == 1:
+                print(f"Error with {batch[0][0]}: {e}")
+                metrics.increment("ebay_revision_failures_total")
+                return [(batch[0], str(e))]
+
+            failed = []
+            for item in batch:
+                failed += self.revise_batch([item])
+            return failed
+
+        # Remember what we pushed so the next update list needs no listing download
+        db.record_pushed_prices(batch)
+        return []
+
+    def update_ebay_listings(self, change_list: list, rounds=3):
+        """
+        Push new prices to eBay in concurrent multi-item batches.
+
+        Listings that fail are retried for up to `rounds` passes; ended listings are not retried.
+
+        Returns:
+            List of ItemIDs that could not be updated, including malformed entries
+            (which are reported and skipped).
+        """
         errorlist = []
+        pending = []
         for item in change_list:
             if not isinstance(item, tuple) or len(item) != 2:
                 print(f"Invalid item format: {item}. Expected (ItemID, new_price).")
-                return
+                errorlist.append(item)
+                continue
 
             itemID, new_price = item
             if not isinstance(itemID, str) or not isinstance(new_price, (int, float)):
                 print(f"Invalid item data: {item}. ItemID should be a string and new_price should be a number.")
-                return
-
-        for itemID, new_price in change_list:
-            try:
-                api = Trading(
-                    appid=self.config["appid"],
-                    devid=self.config["devid"],
-                    certid=self.config["certid"],
-                    token=self.config["token"],
-                    config_file=None,
-                    siteid="0"
-                )
-
-                request = {
-                    'Item': {
-                        'ItemID': itemID,
-                        'StartPrice': new_price
-                    }
-                }
-
-                response = api.execute('ReviseFixedPriceItem', request).dict()
-                print(f"Updated ItemID {itemID} to new price: {new_price}")
-
-            except ConnectionError as e:
-                print(f"Failed to connect to eBay API: {e}")
                 errorlist.append(itemID)
-                api = None
-                if "Auction ended" in str(e):
-                    continue
+                continue
+            pending.append(item)
+
+        for round_num in range(rounds):
+            if not pending:
+                break
+            if round_num:
+                print(f"Retrying {len(pending)} failed listing(s)...")
+
+            batches = [pending[i:i + REVISE_BATCH_SIZE] for i in range(0, len(pending), REVISE_BATCH_SIZE)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                failures = [failure for failed in executor.map(self.revise_batch, batches) for failure in failed]
+
+            pending = []
+            for item, error in failures:
+                if "Auction ended" in error:
+                    errorlist.append(item[0])
                 else:
-                    return
+                    pending.append(item)  # Retry queue
+
+        errorlist += [itemID for itemID, _ in pending]
 
-            except Exception as e:
-                print(f"Error with {itemID}: {e}")
-                api = None
-                errorlist.append(itemID)
-                continue
-        
         print("Finished updating eBay listings.")
 
         if errorlist:
@@ -117,18 +268,45 @@ class EbayAPIInterface:
             for item in errorlist:
                 print(item)
 
+        return errorlist
 
-    def get_all_active_listings(self):
+    def get_item_mpn(self, item_id):
+        """Fetch one listing with GetItem and return its Manufacturer Part Number, or None."""
         try:
-            api = Trading(
-                appid=self.config["appid"],
-                devid=self.config["devid"],
-                certid=self.config["certid"],
-                token=self.config["token"],
-                config_file=None,
-                siteid="0"
-            )
+            item_response = self.execute('GetItem', {
+                'ItemID': item_id,
+                'DetailLevel': 'ReturnAll',
+                'IncludeItemSpecifics': True
+            })
+
+            specifics = item_response.get('Item', {}).get('ItemSpecifics', {}).get('NameValueList', [])
+            if isinstance(specifics, dict):
+                specifics = [specifics]
+
+            for spec in specifics:
+                name = spec.get('Name', '').strip()
+                if name.lower() == 'manufacturer part number':
+                    value = spec.get('Value', 'N/A')
+                    if isinstance(value, list):
+                        value = value[0]  # just in case it's a list
+                    return value
+
+        except Exception as e:
+            print(f"Failed to fetch details for ItemID {item_id}: {e}")
+
+        return None
+
+    def get_all_active_listings(self):
+        """
+        Sync the listings table with the store's active listings.
 
+        GetMyeBaySelling gives every active ItemID and its current price; GetItem (for the
+        MPN) is only called for listings we haven't seen before. Listings that are no
+        longer active are dropped.
+        """
+        from ebaysdk.exception import ConnectionError
+
+        try:
             request = {
                 'ActiveList': {
                     'Include': True,
@@ -140,12 +318,13 @@ class EbayAPIInterface:
                 'DetailLevel': 'ReturnAll'
             }
 
+            known_mpns = db.get_listing_mpns()
             listings_data = []
             page_num = 1
 
             while True:
                 request['ActiveList']['Pagination']['PageNumber'] = page_num
-                response = api.execute('GetMyeBaySelling', request).dict()
+                response = self.execute('GetMyeBaySelling', request)
 
                 # Check if ActiveList exists and has items
                 if 'ActiveList' not in response or 'ItemArray' not in response['ActiveList']:
@@ -157,41 +336,18 @@ class EbayAPIInterface:
 
                 # Process each item
                 for item in items if isinstance(items, list) else [items]:
+                    current_price = item.get('SellingStatus', {}).get('CurrentPrice', {})
+                    try:
+                        price = float(current_price.get('value'))
+                    except (TypeError, ValueError):
+                        price = None
                     item_id = item.get('ItemID', 'N/A')
-                    listing_info = {
+                    listings_data.append({
                         'ItemID': item_id,
-                        'Price': {
-                            'Currency': item.get('SellingStatus', {}).get('CurrentPrice', {}).get('_currencyID', 'N/A'),
-                            'Value': item.get('SellingStatus', {}).get('CurrentPrice', {}).get('value', 'N/A')
-                        },
-                        'ItemSpecifics': []
-                    }
-
-                    # Use GetItem to get full details
-                    try:
-                        item_response = api.execute('GetItem', {
-                            'ItemID': item_id,
-                            'DetailLevel': 'ReturnAll',
-                            'IncludeItemSpecifics': True
-                        }).dict()
-
-                        specifics = item_response.get('Item', {}).get('ItemSpecifics', {}).get('NameValueList', [])
-                        if isinstance(specifics, dict):
-                            specifics = [specifics]
-
-                        for spec in specifics:
-                            name = spec.get('Name', '').strip()
-                            if name.lower() == 'manufacturer part number':
-                                value = spec.get('Value', 'N/A')
-                                if isinstance(value, list):
-                                    value = value[0]  # just in case it's a list
-                                listing_info['ItemSpecifics'].append(value)
-                                break
-
-                    except Exception as e:
-                        print(f"Failed to fetch details for ItemID {item_id}: {e}")
-
-                    listings_data.append(listing_info)
+                        'MPN': known_mpns.get(item_id),
+                        'Price': price,
+                        'Currency': current_price.get('_currencyID', 'N/A')
+                    })
 
                 # Check for more pages
                 pagination = response['ActiveList'].get('PaginationResult', {})
@@ -200,28 +356,45 @@ class EbayAPIInterface:
                     break
                 page_num += 1
 
-            with open("ebay_listings.json", "w") as outfile:
-                json.dump(listings_data, outfile, indent=4)
+            # Use GetItem to get the MPN of new listings (and ones whose lookup failed before)
+            new_listings = [listing for listing in listings_data if listing['MPN'] is None]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                mpns = executor.map(self.get_item_mpn, [listing['ItemID'] for listing in new_listings])
+                for listing_info, mpn in zip(new_listings, mpns):
+                    listing_info['MPN'] = mpn
 
-            print(f"eBay listings data saved to ebay_listings.json")
+            removed = db.sync_listings(listings_data)
+            print(f"Synced {len(listings_data)} eBay listings ({len(new_listings)} looked up, {removed} ended)")
 
         except ConnectionError as e:
             print(f"Failed to connect to eBay API: {e}")
-            api = None
 
-    def update_ids(self):
-        with open("ebay_listings.json", "r") as file:
-            data = json.load(file)
+    def reconcile_if_due(self, max_age_hours=24 * 7, force=False):
+        """
+        Download the full listing set (and refresh part IDs) only when the last download is
+        older than max_age_hours. In between, update lists compare against the prices we
+        pushed; the periodic full pass catches edits made outside this tool and new listings.
 
-        for item in data:
-            part_id = item.get('ItemID')
-            mpn = item.get('ItemSpecifics', [])[0] if item.get('ItemSpecifics') else None
+        Returns:
+            True if a full reconcile ran.
+        """
+        last_sync = db.get_last_listing_sync()
+        if not force and last_sync and datetime.now() - last_sync < timedelta(hours=max_age_hours):
+            print(f"Listings last reconciled {last_sync:%Y-%m-%d %H:%M}, using last pushed prices")
+            return False
 
-            try:
-                db.update_ID(mpn=mpn, part_id=part_id)
-            except Exception as e:
-                print(f"Failed to update ID for MPN {mpn}: {str(e)}")
-                continue
+        self.get_all_active_listings()
+        self.update_ids()
+        return True
+
+    def update_ids(self):
+        pairs = [(mpn, part_id) for part_id, mpn, _ in db.get_listings() if mpn]
+
+        try:
+            db.update_ids_many(pairs)
+        except Exception as e:
+            print(f"Failed to update IDs: {str(e)}")
+            return
         print("IDs updated successfully.")
 
 
@@ -235,8 +408,9 @@ if __name__ == "__main__":
 # For security reasons, this script will not work because a key is required to access
 # eBay's APIs. However, I can explain how it works.
 # The script uses the ebaysdk library to interact with eBay's Trading API.
-# It retrieves all active listings from the user's eBay account and saves them to a JSON file.
-# It is able to read the json file and update the parts in the database (the 'ID' part) so that
+# It retrieves all active listings from the user's eBay account and keeps them in the 'listings' table.
+# It is able to read that table and update the parts in the database (the 'ID' part) so that
 # the information in the database can be linked directly to the eBay listings on your store.
 # The script also includes a function to calculate the price based on Rocky Mountain pricing,
 # including transaction fees and shipping costs. This includes the desired margin of profit.
+# The pricing rules themselves live in pricing.py and can be overridden with a pricing.yaml.
@@ -0,0 +1,208 @@
+import json
+import threading
+from html.parser import HTMLParser
+
+"""
+This script lets the scraper skip the browser once it knows how the site loads a schematic.
+While Playwright navigates a schematic, `capture` records the background request whose
+response contains the assembly table. `fetch_rows` replays that request with a pooled
+HTTP session and parses the table straight from the HTML, so later runs need one
+lightweight request per schematic instead of a full page load.
+"""
+
+TABLE_ID = "oemparts_tblAssmDetails"
+
+# Same row fields scraper.TABLE_SCRIPT returns from the browser
+ROW_FIELDS = ("partNum", "replaces", "status", "regPrice", "ourPrice")
+VALUE_CELLS = ("status", "regPrice", "ourPrice")
+
+# Request headers the replaying session sets itself; copying them would break the replay
+# (stale lengths, hop-by-hop headers, encodings requests can't decode)
+SKIPPED_HEADERS = {
+    "host", "content-length", "connection", "keep-alive", "proxy-connection", "transfer-encoding",
+    "te", "trailer", "upgrade", "accept-encoding"
+}
+
+
+class AssemblyTableParser(HTMLParser):
+    """Collects the assembly table rows from page HTML in the same shape as scraper.TABLE_SCRIPT."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.table_depth = 0  # Tables open inside (and including) the assembly table
+        self.in_tbody = False
+        self.row = None
+        self.cell = None  # Class of the td we're in
+        self.field = None  # Row field currently receiving text
+        self.span_depth = 0
+        self.done = set()  # partNum fields already read for this row (first span / first p only)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "table":
+            if self.table_depth or attrs.get("id") == TABLE_ID:
+                self.table_depth += 1
+            return
+        if not self.table_depth:
+            return
+
+        if tag == "tbody":
+            self.in_tbody = True
+        elif tag == "tr" and self.in_tbody:
+            self.row = dict.fromkeys(ROW_FIELDS, "")
+            self.done = set()
+        elif tag == "td" and self.row is not None:
+            classes = (attrs.get("class") or "").split()
+            self.cell = next((name for name in ("partNum",) + VALUE_CELLS if name in classes), None)
+            self.field = self.cell if self.cell in VALUE_CELLS else None
+        elif tag == "span" and self.cell == "partNum":
+            if self.field == "partNum":
+                self.span_depth += 1
+            elif self.field is None and "partNum" not in self.done:
+                self.field = "partNum"
+                self.span_depth = 1
+        elif tag == "p" and self.cell == "partNum" and self.field is None and "replaces" not in self.done:
+            self.field = "replaces"
+        elif tag == "br" and self.field:
+            self.row[self.field] += "\n"
+
+    def handle_endtag(self, tag):
+        if not self.table_depth:
+            return
+
+        if tag == "table":
+            self.table_depth -= 1
+        elif tag == "span" and self.field == "partNum":
+            self.span_depth -= 1
+            if self.span_depth == 0:
+                self.done.add("partNum")
+                self.field = None
+        elif tag == "p" and self.field == "replaces":
+            self.done.add("replaces")
+            self.field = None
+        elif tag == "td":
+            self.cell = None
+            self.field = None
+        elif tag == "tr" and self.row is not None:
+            self.rows.append({name: " ".join(value.split()) for name, value in self.row.items()})
+            self.row = None
+        elif tag == "tbody":
+            self.in_tbody = False
+
+    def handle_data(self, data):
+        if self.row is not None and self.field:
+            self.row[self.field] += data
+
+
+def find_table_html(text):
+    """Return the HTML holding the assembly table, looking inside JSON responses too."""
+    if not text or TABLE_ID not in text:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text  # Plain HTML
+
+    # JSON wrapper: find the string value that carries the markup
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str) and TABLE_ID in value:
+            return value
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return None
+
+
+def parse_table_html(html):
+    """Parse assembly table rows out of HTML (or a JSON response carrying it)."""
+    html = find_table_html(html)
+    if html is None:
+        return []
+    parser = AssemblyTableParser()
+    parser.feed(html)
+    parser.close()
+    return parser.rows
+
+
+class FastPath:
+    def __init__(self, pool_size=10, timeout=15):
+        self.pool_size = pool_size  # Keep-alive connections per host, per thread
+        self.timeout = timeout  # Seconds per request
+        self.local = threading.local()  # One pooled session per worker thread
+
+    def session(self):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            # Imported here so cache-only runs and offline parsing don't need requests
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.local.session = session
+        return session
+
+    def capture(self, page, navigate):
+        """
+        Run navigate() on a Playwright page while recording its requests.
+        navigate() should only return once the table is on the page, since background
+        responses are delivered while Playwright waits.
+
+        Returns:
+            The request whose response contains the assembly table, as a dict with
+            method, url, headers and body; None if no such request was seen.
+        """
+        responses = []
+
+        def record(response):
+            if response.request.resource_type in ("xhr", "fetch", "document"):
+                responses.append(response)
+
+        page.on("response", record)
+        try:
+            navigate()
+        finally:
+            page.remove_listener("response", record)
+
+        # The table usually arrives last, so look from the end
+        for response in reversed(responses):
+            try:
+                text = response.text()
+            except Exception:
+                continue  # Body no longer available (e.g. redirect or navigated away)
+            if find_table_html(text):
+                request = response.request
+                # all_headers() includes the Cookie header that request.headers leaves out,
+                # so the replay carries the browser's session
+                headers = request.all_headers()
+                return {
+                    "method": request.method,
+                    "url": request.url,
+                    "headers": {
+                        name: value for name, value in headers.items()
+                        if not name.startswith(":") and name.lower() not in SKIPPED_HEADERS
+                    },
+                    "body": request.post_data
+                }
+        return None
+
+    def fetch(self, recipe):
+        """Replay a captured request and return the response text."""
+        response = self.session().request(
+            recipe["method"],
+            recipe["url"],
+            headers=recipe.get("headers"),
+            data=recipe.get("body"),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.text
+
+    def fetch_rows(self, recipe):
+        """Replay a captured request and parse the assembly table rows from the response."""
+        return parse_table_html(self.fetch(recipe))
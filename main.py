@@ -1,25 +1,26 @@
-import scraper
 import database as db
-import part_finder as pf
-import ebay_interface
+import progress
 import customtkinter as ctk
 import threading
-from playwright.sync_api import sync_playwright
+import queue
 
 class App:
     def __init__(self):
         self.root = ctk.CTk()
-        self.root.geometry("400x350")
+        self.root.geometry("400x400")
         self.root.title("Part Scraper")
         
-        # Initialize Variables
-        self.scraper = scraper.Scraper()
+        # Initialize Variables (the scraper and eBay interface are built on first use)
+        self.scraper = None
         self.database = 'parts_database.db'
-        self.interface = ebay_interface.EbayAPIInterface()
+        self.interface = None
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        self.events = queue.Queue()  # Status and progress events from worker threads, drained by the Tk loop
+        self.browser_tasks = queue.Queue()  # Work for the thread that owns the Playwright browser
+        self.browser_thread = None
 
         # Create GUI Elements
         self.create_gui()
@@ -32,99 +33,159 @@ class App:
         self.update_button = ctk.CTkButton(master=self.root, text="Run Update", command=self.run_update)
         self.update_button.pack(pady=10)
         self.status_label = ctk.CTkLabel(master=self.root, text="Status: Ready")
-        self.status_label.pack(pady=(10, 50))
+        self.status_label.pack(pady=(10, 0))
+        self.progress_label = ctk.CTkLabel(master=self.root, text="")
+        self.progress_label.pack(pady=(0, 30))
         self.add_button = ctk.CTkButton(master=self.root, text="Add Parts", command=self.add_parts_button)
         self.add_button.pack(pady=10, side="left", padx=(50, 10))
         self.scrape_button = ctk.CTkButton(master=self.root, text="Scrape Data", command=self.scrape_and_add)
         self.scrape_button.pack(pady=10, side="left", padx=(10, 50))
 
+    def post(self, event_type, **fields):
+        """Queue an event for the Tk loop; safe to call from any thread."""
+        self.events.put({"type": event_type, **fields})
+
+    def set_status(self, message):
+        print(message)
+        self.post("status", text=f"Status: {message}")
+
+    def drain_events(self):
+        """Apply queued worker events on the Tk thread, then check again shortly."""
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event["type"] == "status":
+                    self.status_label.configure(text=event["text"])
+                elif event["type"] == "progress":
+                    self.progress_label.configure(text=progress.format_event(event))
+                elif event["type"] == "clear_entry":
+                    self.entry_box.delete(0, "end")
+                elif event["type"] == "update_finished":
+                    self.update_button.configure(state="normal")
+        except queue.Empty:
+            pass
+        self.root.after(100, self.drain_events)
+
+    def run_in_browser_thread(self, task):
+        """
+        Run task on the thread that owns the Playwright browser.
+
+        Sync Playwright objects only work on the thread that started them, so every
+        call touching self.page goes through one long-lived worker thread.
+        """
+        if self.browser_thread is None:
+            self.browser_thread = threading.Thread(target=self.browser_worker, daemon=True)
+            self.browser_thread.start()
+        self.browser_tasks.put(task)
+
+    def browser_worker(self):
+        while True:
+            task = self.browser_tasks.get()
+            if task is None:
+                break
+            task()
+
     def add_parts_button(self):
+        self.set_status("Opening browser...")
+        self.run_in_browser_thread(self.open_browser_task)
+
+    def open_browser_task(self):
         try:
-            self.status_label.configure(text="Status: Opening browser...")
-            self.root.update()
             self.open_browser()
-            self.status_label.configure(text="Status: Browser Opened Successfully")
-            self.root.update()
+            self.set_status("Browser Opened Successfully")
         except Exception as e:
-            self.status_label.configure(text=f"Status: Error - {str(e)}")
+            self.set_status(f"Error - {str(e)}")
             print(f"Error in add_parts_button: {str(e)}")
 
     def open_browser(self):
+        import part_finder as pf
+
         if not self.page:
             self.playwright, self.browser, self.context, self.page = pf.open_browser()
         else:
             self.page.goto("https://www.rockymountainatvmc.com/oem-parts")
 
     def scrape_and_add(self):
+        # Read the entry on the Tk thread, then scrape on the browser's thread
+        mpn = self.entry_box.get().strip()
+        if not mpn:
+            self.set_status("Error - No MPN provided")
+            return
+        self.set_status("Scraping...")
+        self.run_in_browser_thread(lambda: self.scrape_and_add_task(mpn))
+
+    def scrape_and_add_task(self, mpn):
+        import part_finder as pf
+
         try:
-            self.status_label.configure(text="Status: Scraping...")
-            self.root.update()
-            mpn = self.entry_box.get().strip()
-            if not mpn:
-                self.status_label.configure(text="Status: Error - No MPN provided")
-                self.root.update()
-                return
             if not self.page:
-                self.status_label.configure(text="Status: Error - Browser not open")
-                self.root.update()
+                self.set_status("Error - Browser not open")
                 return
             instructions = pf.scrape_data(self.page, mpn)
             if instructions:
                 pf.add_to_database(instructions)
-                self.status_label.configure(text=f"Status: Part {mpn} Added Successfully")
-                self.entry_box.delete(0, "end")
+                self.set_status(f"Part {mpn} Added Successfully")
+                self.post("clear_entry")
             else:
-                self.status_label.configure(text="Status: No Data Scraped")
-            self.root.update()
+                self.set_status("No Data Scraped")
         except Exception as e:
-            self.status_label.configure(text=f"Status: Error - {str(e)}")
+            self.set_status(f"Error - {str(e)}")
             print(f"Error in scrape_and_add: {str(e)}")
-            self.root.update()
 
     def find_part(self):
+        mpn = self.entry_box.get()
+        self.set_status("Finding part...")
+        threading.Thread(target=self.find_part_task, args=(mpn,), daemon=True).start()
+
+    def find_part_task(self, mpn):
         try:
-            self.status_label.configure(text="Status: Finding part...")
-            self.root.update()
-            part = db.get_part(mpn=self.entry_box.get())
+            part = db.get_part(mpn=mpn)
             if part:
                 in_stock = "In Stock" if part[1] == 1 else "Out of Stock"
                 price = part[2]
-                self.status_label.configure(text=f"Status: Part Found - {in_stock}, ${price}")
+                self.set_status(f"Part Found - {in_stock}, ${price}")
             else:
-                self.status_label.configure(text="Status: Part Not Found")
-            self.root.update()
+                self.set_status("Part Not Found")
         except Exception as e:
-            self.status_label.configure(text=f"Status: Error - {str(e)}")
+            self.set_status(f"Error - {str(e)}")
             print(f"Error in find_part: {str(e)}")
-            self.root.update()
 
     def run_update(self):
+        self.update_button.configure(state="disabled")
         threading.Thread(target=self.update_parts, daemon=True).start()
 
     def update_parts(self):
         try:
-            self.status_label.configure(text="Status: Scraping...")
-            self.root.update()
-            self.scraper.collect_info()
-            self.status_label.configure(text="Status: Scraping Complete - Grabbing eBay Listings...")
-            self.root.update()
-            self.interface.get_all_active_listings()
-            self.status_label.configure(text="Status: eBay Listings Retrieved - Updating Ids...")
-            self.root.update()
-            self.interface.update_ids()
-            self.status_label.configure(text="Status: IDs Updated - Preparing Update List...")
-            self.root.update()
-            update_list = self.interface.make_update_list()
-            self.status_label.configure(text="Status: Update List Created - Updating eBay Listings...")
-            self.root.update()
-            self.interface.update_ebay_listings(update_list)
-            self.status_label.configure(text="Status: eBay Listings Updated Successfully!")
-            self.root.update()
-            
+            # Playwright, ebaysdk and NumPy are only loaded once an update is actually run
+            import scraper
+            import ebay_interface
+            import pipeline
+
+            if self.scraper is None:
+                self.scraper = scraper.Scraper()
+            if self.interface is None:
+                self.interface = ebay_interface.EbayAPIInterface()
         except Exception as e:
-            self.status_label.configure(text=f"Status: Error - {str(e)}")
+            self.set_status(f"Error - {str(e)}")
+            self.post("update_finished")
+            return
+
+        tracker = progress.ProgressTracker(self.events.put)
+        self.scraper.start_listeners.append(tracker.start)
+        self.scraper.result_listeners.append(tracker.update)
+        try:
+            # Scrape, price and push eBay revisions as one streaming pipeline
+            updater = pipeline.Pipeline(self.scraper, self.interface, status=self.set_status)
+            updater.run()
+            self.set_status("eBay Listings Updated Successfully!")
+
+        except Exception as e:
+            self.set_status(f"Error - {str(e)}")
             print(f"Error in update: {str(e)}")
-            self.root.update()
+        finally:
+            self.scraper.start_listeners.remove(tracker.start)
+            self.scraper.result_listeners.remove(tracker.update)
+            self.post("update_finished")
 
     def cleanup_playwright(self):
         try:
@@ -146,10 +207,15 @@ class App:
 
     def start(self):
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(100, self.drain_events)
         self.root.mainloop()
 
     def on_closing(self):
-        self.cleanup_playwright()
+        if self.browser_thread is not None:
+            # Playwright has to be shut down on the thread that started it
+            self.browser_tasks.put(self.cleanup_playwright)
+            self.browser_tasks.put(None)
+            self.browser_thread.join(timeout=10)
         self.root.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+
+"""
+This script records where a refresh run spends its time.
+Code under measurement calls `timer`/`observe` for latencies (seconds, kept as
+histograms) and `increment` for counters such as retries and failures, each with
+optional labels (e.g. verb="GetItem"). `export` writes a per-run JSON summary and a
+Prometheus text file. Worker processes send their `snapshot()` back to the parent,
+which `merge`s it.
+"""
+
+# Histogram bucket upper bounds in seconds; the last bucket catches everything above
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS_DIR = "metrics"
+
+lock = threading.Lock()
+histograms = {}  # (name, labels) -> [bucket counts, sum, count, min, max]
+counters = {}  # (name, labels) -> value
+
+
+def key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def observe(name, seconds, **labels):
+    """Record one latency sample."""
+    with lock:
+        histogram = histograms.get(key(name, labels))
+        if histogram is None:
+            histogram = histograms[key(name, labels)] = [[0] * (len(BUCKETS) + 1), 0.0, 0, None, None]
+        histogram[0][bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+        histogram[3] = seconds if histogram[3] is None else min(histogram[3], seconds)
+        histogram[4] = seconds if histogram[4] is None else max(histogram[4], seconds)
+
+
+def increment(name, amount=1, **labels):
+    with lock:
+        counters[key(name, labels)] = counters.get(key(name, labels), 0) + amount
+
+
+@contextmanager
+def timer(name, **labels):
+    """Time the enclosed block, including when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timed(name, **labels):
+    """Decorator form of `timer`."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset():
+    with lock:
+        histograms.clear()
+        counters.clear()
+
+
+def snapshot():
+    """Picklable copy of everything recorded so far."""
+    with lock:
+        return {
+            "histograms": {name: [list(h[0])] + h[1:] for name, h in histograms.items()},
+            "counters": dict(counters)
+        }
+
+
+def merge(other):
+    """Add a snapshot (e.g. from a worker process) into this process's metrics."""
+    with lock:
+        for name, (buckets, total, count, low, high) in other["histograms"].items():
+            histogram = histograms.get(name)
+            if histogram is None:
+                histograms[name] = [list(buckets), total, count, low, high]
+                continue
+            histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+            histogram[1] += total
+            histogram[2] += count
+            if low is not None:
+                histogram[3] = low if histogram[3] is None else min(histogram[3], low)
+                histogram[4] = high if histogram[4] is None else max(histogram[4], high)
+        for name, value in other["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+
+
+def percentile(buckets, count, fraction):
+    """Estimate a percentile as the upper bound of the bucket it falls in."""
+    if not count:
+        return None
+    target = count * fraction
+    seen = 0
+    for bound, bucket_count in zip(BUCKETS + (None,), buckets):
+        seen += bucket_count
+        if seen >= target:
+            return bound
+    return None
+
+
+def summary():
+    """Per-metric dict of latency statistics and counter values."""
+    data = snapshot()
+    result = {"histograms": {}, "counters": {}}
+    for (name, labels), (buckets, total, count, low, high) in sorted(data["histograms"].items()):
+        result["histograms"].setdefault(name, []).append({
+            "labels": dict(labels),
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else None,
+            "min": low,
+            "max": high,
+            "p50": percentile(buckets, count, 0.5),
+            "p95": percentile(buckets, count, 0.95),
+            "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], buckets))
+        })
+    for (name, labels), value in sorted(data["counters"].items()):
+        result["counters"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+    return result
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels, extra=None):
+    labels = list(labels) + ([extra] if extra else [])
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{label}="{escape_label(value)}"' for label, value in labels) + "}"
+
+
+def prometheus_text():
+    """Everything recorded so far in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+    typed = set()
+    for (name, labels), (buckets, total, count, low, high) in sorted(data["histograms"].items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, bucket_count in zip([str(bound) for bound in BUCKETS] + ["+Inf"], buckets):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{format_labels(labels, ('le', bound))} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {total}")
+        lines.append(f"{name}_count{format_labels(labels)} {count}")
+    for (name, labels), value in sorted(data["counters"].items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path, text):
+    # Write then rename so a collector never reads a half-written file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        file.write(text)
+    os.replace(temp_path, path)
+
+
+def export(run_id, directory=METRICS_DIR):
+    """
+    Write this run's metrics to `directory`.
+
+    Returns:
+        (json_path, prometheus_path): run-<run_id>.json is kept per run; scraper.prom is
+        overwritten with the latest run for a Prometheus textfile collector.
+    """
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, f"run-{run_id}.json")
+    prometheus_path = os.path.join(directory, "scraper.prom")
+
+    report = {"run_id": run_id, "written": time.strftime("%Y-%m-%d %H:%M:%S")}
+    report.update(summary())
+    write_file(json_path, json.dumps(report, indent=2))
+    write_file(prometheus_path, prometheus_text())
+    print(f"Metrics written to {json_path} and {prometheus_path}")
+    return json_path, prometheus_path
@@ -28,12 +28,18 @@ def scrape_data(page, mpn):
     for title in titles:
         selector = f"select[title='{title}']"
         try:
+            # Not every schematic uses all six choices; skip absent dropdowns instead of waiting them out
+            locator = page.locator(selector)
+            if locator.count() == 0:
+                print(f"No value found for {title}")
+                continue
+
             if title == "First Choice":
-                value = page.locator(selector).evaluate("element => element.options[element.selectedIndex].text", timeout=500)
+                value = locator.evaluate("element => element.options[element.selectedIndex].text", timeout=500)
                 if value == "Arctic Cat":
                     value = "Arctic-Cat"
             else:
-                value = page.locator(selector).evaluate("element => element.value", timeout=500)
+                value = locator.evaluate("element => element.value", timeout=500)
 
             if value:
                 print(f"Scraped {title}: {value}")
@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+import database as db
+import metrics
+from ebay_interface import REVISE_BATCH_SIZE
+
+"""
+This script runs scraping and eBay repricing as one streaming pipeline.
+Each batch of parts the scraper saves is priced against its eBay listings right away,
+and price changes are pushed to eBay in small batches while scraping continues:
+
+    Scraper.collect_info -> scraped queue -> pricing -> revisions queue -> eBay reviser
+
+The eBay listing sync (only when a full reconcile is due) runs alongside the scrape;
+pricing starts once it has finished.
+Queues are bounded, so a slow stage holds back the stages feeding it, and a None
+sentinel flows down the queues for a clean shutdown.
+"""
+
+class Pipeline:
+    def __init__(self, scraper, interface, queue_size=1000, batch_wait=2.0, status=None,
+                 reconcile=False, reconcile_hours=24 * 7):
+        self.scraper = scraper
+        self.interface = interface
+        self.scraped = queue.Queue(maxsize=queue_size)  # Saved result batches waiting to be priced
+        self.revisions = queue.Queue(maxsize=queue_size)  # (ItemID, new_price) waiting to be sent
+        self.batch_wait = batch_wait  # Seconds to wait for a full revision batch before sending a partial one
+        self.status = status or print  # Called with progress messages
+        self.reconcile = reconcile  # Force a full listing download this run
+        self.reconcile_hours = reconcile_hours  # Otherwise only download when the last one is this old
+        self.listings_ready = threading.Event()
+        self.failed = []  # (ItemID, new_price) that failed in the streaming pass
+        self.revised = 0
+
+    def run(self, **collect_kwargs):
+        """
+        Scrape (collect_info keyword arguments are passed through) and reprice as results arrive.
+
+        Returns the run id; the run's metrics are exported under metrics.METRICS_DIR.
+        """
+        metrics.reset()
+        run_id = None
+        stages = [
+            threading.Thread(target=self.sync_listings, daemon=True),
+            threading.Thread(target=self.price_stage, daemon=True),
+            threading.Thread(target=self.revise_stage, daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+
+        self.scraper.result_listeners.append(self.scraped.put)
+        try:
+            self.status("Scraping and repricing...")
+            run_id = self.scraper.collect_info(**collect_kwargs)
+        finally:
+            self.scraper.result_listeners.remove(self.scraped.put)
+            self.scraped.put(None)  # Shuts down pricing, which then shuts down the reviser
+            for stage in stages:
+                stage.join()
+
+        if self.failed:
+            self.status(f"Retrying {len(self.failed)} failed revision(s)...")
+            self.interface.update_ebay_listings(self.failed)
+
+        self.status(f"Pipeline finished: {self.revised} listing(s) repriced")
+        try:
+            metrics.export(run_id)
+        except OSError as e:
+            print(f"Failed to write metrics: {str(e)}")
+        return run_id
+
+    def sync_listings(self):
+        try:
+            self.interface.reconcile_if_due(self.reconcile_hours, force=self.reconcile)
+        except Exception as e:
+            print(f"Listing sync failed, pricing against the last known listings: {str(e)}")
+        finally:
+            self.listings_ready.set()
+
+    def price_stage(self):
+        self.listings_ready.wait()
+        try:
+            while True:
+                results = self.scraped.get()
+                if results is None:
+                    break
+
+                try:
+                    mpns = [result["current_mpn"] for result in results if result["status"] == "done"]
+                    if not mpns:
+                        continue
+                    for item in self.interface.price_listings(db.get_listing_prices(mpns)):
+                        self.revisions.put(item)
+                except Exception as e:
+                    print(f"Pricing failed for batch: {str(e)}")
+        finally:
+            self.revisions.put(None)
+
+    def revise_stage(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self.revisions.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # Waited long enough, send what we have
+
+            if item:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.batch_wait
+
+            if batch and (item is None or item is False or len(batch) >= REVISE_BATCH_SIZE):
+                self.send(batch)
+                batch = []
+                deadline = None
+
+            if item is None:
+                break
+
+    def send(self, batch):
+        try:
+            failures = self.interface.revise_batch(batch)
+        except Exception as e:
+            print(f"Revision batch failed: {str(e)}")
+            failures = [(item, str(e)) for item in batch]
+
+        self.revised += len(batch) - len(failures)
+        self.failed += [item for item, error in failures if "Auction ended" not in error]
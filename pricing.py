@@ -0,0 +1,106 @@
+import copy
+import numpy as np
+import yaml
+
+"""
+This script turns Rocky Mountain prices into eBay prices.
+The fee, shipping, margin tier and rounding rules are data (DEFAULT_RULES, or a
+pricing.yaml with the same keys), and whole arrays of supplier prices are priced
+in one vectorized pass. `simulate` compares a candidate rule set against the
+current one across every listing before it goes live.
+"""
+
+# Today's rules. Tiers are checked in order against the cost after fees and shipping;
+# the first whose upper bound fits wins and prices it as (cost * multiplier + add) / fee_divisor.
+DEFAULT_RULES = {
+    "transaction_fee": 0.3,  # 30 cent transaction fee
+    "shipping": 7,  # Added to orders below free_shipping_below
+    "free_shipping_below": 75,
+    "fee_divisor": 0.88,  # eBay keeps 12% of the sale
+    "tiers": [
+        {"upper": 25, "inclusive": False, "multiplier": 1, "add": 5},
+        {"upper": 50, "inclusive": True, "multiplier": 1, "add": 10},
+        {"upper": 100, "inclusive": True, "multiplier": 1.3, "add": 0},
+        {"upper": 200, "inclusive": True, "multiplier": 1.35, "add": 0},
+        {"upper": None, "inclusive": True, "multiplier": 1.4, "add": 0}
+    ],
+    "round_base": 5,  # Format of ###.98
+    "round_offset": 0.02
+}
+
+
+class PricingEngine:
+    def __init__(self, rules=None):
+        self.rules = copy.deepcopy(rules or DEFAULT_RULES)
+
+    @classmethod
+    def from_file(cls, path="pricing.yaml"):
+        """Load rules from a YAML file, falling back to today's rules if it doesn't exist."""
+        try:
+            with open(path, "r") as file:
+                rules = yaml.safe_load(file)
+        except FileNotFoundError:
+            rules = None
+        return cls(rules)
+
+    def price(self, rm_prices):
+        """Price an array (or list) of supplier prices in one pass; returns a float64 array."""
+        rules = self.rules
+        total = np.asarray(rm_prices, dtype=np.float64) + rules["transaction_fee"]
+        total = np.where(total < rules["free_shipping_below"], total + rules["shipping"], total)
+
+        # Walk the tiers from last to first so the first matching tier wins
+        priced = np.full(total.shape, np.nan)
+        for tier in reversed(rules["tiers"]):
+            if tier["upper"] is None:
+                matches = np.ones(total.shape, dtype=bool)
+            elif tier["inclusive"]:
+                matches = total <= tier["upper"]
+            else:
+                matches = total < tier["upper"]
+            priced = np.where(matches, (total * tier["multiplier"] + tier["add"]) / rules["fee_divisor"], priced)
+
+        base = rules["round_base"]
+        return base * np.round(priced / base) - rules["round_offset"]
+
+    def price_one(self, rm_price):
+        return float(self.price([rm_price])[0])
+
+    def margin(self, prices, rm_prices):
+        """What we keep per sale after eBay's cut, the supplier price, the transaction fee and shipping."""
+        rules = self.rules
+        rm_prices = np.asarray(rm_prices, dtype=np.float64)
+        cost = rm_prices + rules["transaction_fee"]
+        cost = np.where(cost < rules["free_shipping_below"], cost + rules["shipping"], cost)
+        return np.asarray(prices, dtype=np.float64) * rules["fee_divisor"] - cost
+
+    def simulate(self, candidate_rules, rm_prices, current_prices=None):
+        """
+        Compare a candidate rule set against these rules over a whole catalog.
+
+        Args:
+            candidate_rules: Rules dict in the same format as DEFAULT_RULES.
+            rm_prices: Supplier prices, one per listing.
+            current_prices: What the listings sell for now; defaults to pricing them with these rules.
+
+        Returns:
+            Dict with the number of listings, how many would change price, and the total
+            and average change in margin per sale.
+        """
+        rm_prices = np.asarray(rm_prices, dtype=np.float64)
+        if current_prices is None:
+            current_prices = self.price(rm_prices)
+        current_prices = np.asarray(current_prices, dtype=np.float64)
+
+        candidate = PricingEngine(candidate_rules)
+        new_prices = candidate.price(rm_prices)
+
+        changed = np.round(new_prices, 2) != np.round(current_prices, 2)
+        delta = candidate.margin(new_prices, rm_prices) - self.margin(current_prices, rm_prices)
+
+        return {
+            "listings": int(rm_prices.size),
+            "changed": int(changed.sum()),
+            "margin_delta": float(delta.sum()),
+            "average_margin_delta": float(delta.mean()) if rm_prices.size else 0.0
+        }
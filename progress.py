@@ -0,0 +1,63 @@
+import time
+
+"""
+This script turns the scraper's saved result batches into progress events.
+Events are plain dicts (parts done/total, current MPN, parts per minute, ETA, errors)
+so worker threads can hand them to the GUI through a queue without touching Tk.
+"""
+
+class ProgressTracker:
+    def __init__(self, send):
+        self.send = send  # Called with each progress event dict
+        self.total = 0
+        self.done = 0
+        self.errors = 0
+        self.started = None
+
+    def start(self, total):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.send(self.event(None))
+
+    def update(self, results):
+        """Result listener: count a saved batch and send a progress event."""
+        if self.started is None:
+            self.start(0)
+        self.done += len(results)
+        self.errors += sum(1 for result in results if result["status"] != "done")
+        self.send(self.event(results[-1]["mpn"] if results else None))
+
+    def event(self, mpn):
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = max(self.total - self.done, 0)
+        eta = remaining / rate * 60 if rate > 0 else None
+        return {
+            "type": "progress",
+            "done": self.done,
+            "total": self.total,
+            "mpn": mpn,
+            "parts_per_minute": rate,
+            "eta": eta,
+            "errors": self.errors
+        }
+
+
+def format_event(event):
+    """One-line summary of a progress event for a status label or console."""
+    eta = event["eta"]
+    if eta is None:
+        eta_text = "--:--"
+    else:
+        minutes, seconds = divmod(int(eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        eta_text = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+    text = f"{event['done']}/{event['total']} parts | {event['parts_per_minute']:.0f}/min | ETA {eta_text}"
+    if event["errors"]:
+        text += f" | {event['errors']} error(s)"
+    if event["mpn"]:
+        text += f"\nLast: {event['mpn']}"
+    return text
@@ -0,0 +1,63 @@
+"""
+This script holds the command-line options shared by every way of starting a refresh
+(`python scraper.py` and `python cli.py refresh`), so the two can't drift apart.
+It only imports the scheduler when a budget is given, and never Playwright.
+"""
+
+def add_refresh_arguments(parser, headless=False):
+    """
+    Add the scraper, checkpoint and scheduling options to an argparse parser.
+
+    Args:
+        headless: Default browser profile. False adds --headless, True adds --headed;
+                  either way the result is in args.headless.
+    """
+    parser.add_argument("--shards", type=int, default=1, help="Worker processes, each with its own browser")
+    parser.add_argument("--workers", type=int, default=1, help="Browser pages per process")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Max requests per second to the site, across all workers")
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts per schematic")
+    parser.add_argument("--run-id", default=None, help="Checkpoint key for this run")
+    parser.add_argument("--resume", action="store_true", help="Skip parts already finished in the run (latest run if no --run-id)")
+    if headless:
+        parser.add_argument("--headed", dest="headless", action="store_false", help="Show the browser window instead of the headless profile")
+    else:
+        parser.add_argument("--headless", action="store_true", help="Run without a window and skip images, fonts, media and trackers")
+    parser.set_defaults(headless=headless)
+    parser.add_argument("--fast-path", action="store_true", help="Replay captured table requests over HTTP, using the browser only as a fallback")
+    parser.add_argument("--cache", action="store_true", help="Snapshot schematic tables to disk and reuse fresh snapshots")
+    parser.add_argument("--cache-only", action="store_true", help="Work entirely from cached snapshots, without the site")
+    parser.add_argument("--cache-ttl-hours", type=float, default=24, help="How long a cached snapshot stays fresh")
+    parser.add_argument("--no-nav-cache", action="store_true", help="Always replay the dropdowns instead of using remembered schematic URLs")
+    parser.add_argument("--top", type=int, default=None, help="Only refresh the N most urgent parts")
+    parser.add_argument("--max-requests", type=int, default=None, help="Visit at most this many schematic pages")
+    parser.add_argument("--budget-minutes", type=float, default=None, help="Only schedule what fits in this many minutes")
+
+
+def scraper_kwargs(args):
+    """Scraper constructor arguments from parsed options."""
+    return {
+        "workers": args.workers,
+        "rate_limit": args.rate_limit,
+        "retries": args.retries,
+        "shards": args.shards,
+        "headless": args.headless,
+        "use_fast_path": args.fast_path,
+        "use_cache": args.cache,
+        "cache_only": args.cache_only,
+        "cache_ttl": args.cache_ttl_hours * 3600,
+        "use_nav_cache": not args.no_nav_cache
+    }
+
+
+def collect_kwargs(args):
+    """Scraper.collect_info arguments: the checkpoint options plus the scheduled parts, if any budget was given."""
+    kwargs = {"run_id": args.run_id, "resume": args.resume}
+    if args.top is not None or args.max_requests is not None or args.budget_minutes is not None:
+        import scheduler
+
+        kwargs["items"] = scheduler.Scheduler().select(
+            top_k=args.top,
+            max_requests=args.max_requests,
+            budget_seconds=args.budget_minutes * 60 if args.budget_minutes is not None else None
+        )
+    return kwargs
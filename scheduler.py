@@ -0,0 +1,86 @@
+import math
+from datetime import date, datetime
+import database as db
+
+"""
+This script decides which parts a refresh run should scrape.
+Parts are ranked by how stale they are, whether they are listed on eBay, how often
+and how far their price has moved recently and how much they sell for, and the top
+of the list is picked within a part count and request (or time) budget.
+"""
+
+class Scheduler:
+    def __init__(self, age_weight=1.0, listed_weight=30.0, volatility_weight=5.0, spread_weight=50.0, price_weight=2.0,
+                 volatility_days=90, seconds_per_schematic=5.0):
+        self.age_weight = age_weight  # Per day since the part was last refreshed
+        self.listed_weight = listed_weight  # Bonus for parts with a live eBay listing
+        self.volatility_weight = volatility_weight  # Per price change in the last volatility_days
+        self.spread_weight = spread_weight  # Per unit of price standard deviation relative to the price (0.1 = 10%)
+        self.price_weight = price_weight  # Per log-dollar of supplier price
+        self.volatility_days = volatility_days
+        self.seconds_per_schematic = seconds_per_schematic  # Used to turn a time budget into a request budget
+
+    def score(self, part, volatility, today):
+        try:
+            age = (today - datetime.strptime(part["Date"], "%Y-%m-%d").date()).days
+        except (TypeError, ValueError):
+            age = 365  # Unknown date, treat as very stale
+
+        changes, spread = volatility.get(part["MPN"], (0, 0.0))
+        relative_spread = spread / part["Price"] if part["Price"] else 0.0
+
+        score = age * self.age_weight
+        score += changes * self.volatility_weight
+        score += relative_spread * self.spread_weight
+        score += math.log1p(part["Price"] or 0) * self.price_weight
+        if part["ID"] is not None:
+            score += self.listed_weight
+        return score
+
+    def rank(self, parts=None):
+        """Return parts (all parts in the database if None) sorted most urgent first."""
+        if parts is None:
+            parts = db.make_parts_list()
+        volatility = db.get_price_volatility(self.volatility_days)
+        today = date.today()
+        return sorted(parts, key=lambda part: self.score(part, volatility, today), reverse=True)
+
+    def select(self, parts=None, top_k=None, max_requests=None, budget_seconds=None):
+        """
+        Pick the parts to refresh this run.
+
+        Args:
+            parts: Candidate parts from db.make_parts_list(), all parts if None.
+            top_k: Maximum number of ranked parts to pick, None for no limit.
+            max_requests: Maximum number of schematic pages to visit, None for no limit.
+            budget_seconds: Time budget, converted to pages with seconds_per_schematic.
+
+        Returns:
+            List of part dicts. Other parts on a chosen schematic are included too,
+            since refreshing them costs no extra page visit.
+        """
+        if budget_seconds is not None:
+            pages = int(budget_seconds / self.seconds_per_schematic)
+            max_requests = pages if max_requests is None else min(max_requests, pages)
+
+        ranked = self.rank(parts)
+
+        chosen = set()
+        picked = 0
+        for part in ranked:
+            if top_k is not None and picked >= top_k:
+                break
+            key = tuple(part["Instructions"])
+            if key not in chosen:
+                if max_requests is not None and len(chosen) >= max_requests:
+                    continue
+                chosen.add(key)
+            picked += 1
+
+        selected = [part for part in ranked if tuple(part["Instructions"]) in chosen]
+        print(f"Scheduled {len(selected)} of {len(ranked)} parts on {len(chosen)} schematics")
+        return selected
+
+if __name__ == "__main__":
+    for part in Scheduler().rank()[:20]:
+        print(part["MPN"], part["Date"], part["ID"], part["Price"])
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+
+"""
+This script keeps compressed snapshots of schematic assembly tables on disk.
+Snapshots are keyed by a hash of the instruction path, expire after a TTL, and the
+least recently used ones are evicted once the cache grows past its size limit.
+The scraper can re-parse them offline with fast_path.parse_table_html, so debugging,
+re-pricing and test runs don't have to load the site again.
+"""
+
+class SchematicCache:
+    def __init__(self, directory="schematic_cache", ttl=24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl  # Seconds a snapshot stays fresh, None to never expire
+        self.max_bytes = max_bytes  # Total size on disk before least recently used snapshots are evicted
+        os.makedirs(self.directory, exist_ok=True)
+        # Running estimate of the cache size, so put() only scans the directory when it may be full.
+        # Other processes writing the same directory make it drift; each evict() resets it.
+        self.total_bytes = self.scan()[1]
+
+    def key(self, instructions):
+        return hashlib.sha256(json.dumps(list(instructions)).encode()).hexdigest()
+
+    def path(self, instructions):
+        return os.path.join(self.directory, self.key(instructions) + ".json.z")
+
+    def get(self, instructions):
+        """Return the cached table HTML for an instruction path, or None if missing or expired."""
+        path = self.path(instructions)
+        try:
+            with open(path, "rb") as file:
+                snapshot = json.loads(zlib.decompress(file.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+        if self.ttl is not None and time.time() - snapshot["captured"] > self.ttl:
+            return None
+
+        # mtime tracks last use for LRU eviction; capture time lives inside the snapshot
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return snapshot["html"]
+
+    def put(self, instructions, html):
+        snapshot = {"instructions": list(instructions), "captured": time.time(), "html": html}
+        path = self.path(instructions)
+
+        data = zlib.compress(json.dumps(snapshot).encode(), 6)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+
+        # Write then rename so concurrent readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+        self.total_bytes += len(data) - replaced
+        if self.max_bytes is not None and self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def scan(self):
+        """Return ([(last used, size, name)], total size) for every snapshot on disk."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json.z"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # Removed by another worker
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        return entries, total
+
+    def evict(self):
+        """
+        Delete least recently used snapshots until the cache is 10% under max_bytes,
+        so the next few puts don't trigger another full scan.
+        """
+        if self.max_bytes is None:
+            return
+
+        entries, total = self.scan()
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json.z"):
+                os.remove(os.path.join(self.directory, name))
+        self.total_bytes = 0
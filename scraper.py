@@ -1,124 +1,577 @@
 import database as db
+import refresh_options
+import fast_path
+import metrics
+from throttle import RateLimiter
+from schematic_cache import SchematicCache
 import re
+import time
+import queue
+import threading
+import zlib
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from playwright.sync_api import sync_playwright as pw
 
+# Runs in the page: returns every assembly table row as plain strings in a single round trip
+TABLE_SCRIPT = """
+table => Array.from(table.querySelectorAll('tbody tr')).map(row => {
+    const text = el => el ? el.innerText.trim() : '';
+    const cell = row.querySelector('td.partNum');
+    return {
+        partNum: text(cell ? cell.querySelector('span') : null),
+        replaces: text(cell ? cell.querySelector('p') : null),
+        status: text(row.querySelector('td.status')),
+        regPrice: text(row.querySelector('td.regPrice')),
+        ourPrice: text(row.querySelector('td.ourPrice'))
+    };
+})
+"""
+
+# Runs in the page: true once the select exists and offers the option we want to pick
+OPTION_SCRIPT = """
+([selector, value]) => {
+    const el = document.querySelector(selector);
+    return !!el && Array.from(el.options).some(option => option.value === value);
+}
+"""
+
+# The scraper only reads dropdowns and the assembly table, so the headless profile skips these
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "bing.com",
+    "criteo.com",
+    "pinterest.com",
+    "klaviyo.com"
+)
+
+# Runs in the page: true when the schematic dropdown (if shown) is on the schematic we asked for
+SCHEMATIC_SCRIPT = """
+value => {
+    const el = document.querySelector("select[title='Parts Schematic']");
+    return !el || el.value === value;
+}
+"""
+
 class Scraper:
-    def __init__(self):
+    def __init__(self, wait_timeout=10000, workers=1, rate_limit=None, retries=1, shards=1, headless=False, use_fast_path=False,
+                 use_cache=False, cache_only=False, cache_ttl=24 * 3600, use_nav_cache=True):
         self.URL = "https://www.rockymountainatvmc.com/oem-parts"
+        self.use_nav_cache = use_nav_cache  # Jump straight to remembered schematic URLs
+        self.result_listeners = []  # Called with each batch of results after it is saved
+        self.start_listeners = []  # Called with the number of parts once a run knows what it will scrape
+        self.use_cache = use_cache or cache_only
+        self.cache_only = cache_only  # Parse from cached snapshots only, never touch the site
+        self.cache_ttl = cache_ttl
+        # Cache-only runs re-parse whatever was captured, however old
+        self.cache = SchematicCache(ttl=None if cache_only else cache_ttl) if self.use_cache else None
+        self.use_fast_path = use_fast_path
+        # Replays captured table requests without a browser; Playwright remains the fallback
+        self.fast_path = fast_path.FastPath() if use_fast_path else None
+        self.headless = headless  # Headless refresh profile: no window, heavy and tracking requests blocked
+        self.bytes_transferred = 0  # Response bytes received by all of this process's pages
+        self.bytes_lock = threading.Lock()
+        self.shards = shards  # Number of worker processes, each with its own browser(s)
+        self.wait_timeout = wait_timeout  # Upper bound (ms) for any single readiness wait
+        self.wait_times = {}  # Label -> list of actual wait durations (ms)
+        self.workers = workers  # Number of browser pages scraping in parallel
+        self.retries = retries  # Extra attempts per schematic before giving up
+        self.rate_limit = rate_limit
+        self.limiter = RateLimiter(rate_limit)  # Global requests/second to the site, None for no limit
+
+    def wait_for(self, label, condition):
+        """Run a readiness condition and record how long it actually took."""
+        start = time.perf_counter()
+        try:
+            return condition()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.wait_times.setdefault(label, []).append(elapsed * 1000)
+            metrics.observe("scraper_wait_seconds", elapsed, wait=label)
+
+    def wait_for_option(self, page, selector, value):
+        """Wait until the dropdown is populated with the option we are about to select."""
+        self.wait_for("dropdown", lambda: page.wait_for_function(
+            OPTION_SCRIPT, arg=[selector, value], timeout=self.wait_timeout))
+
+    def wait_for_table(self, page):
+        """Wait until the assembly table is rendered."""
+        self.wait_for("table", lambda: page.locator("#oemparts_tblAssmDetails").wait_for(
+            state="visible", timeout=self.wait_timeout))
+
+    def filter_request(self, route):
+        """Abort requests for images, media, fonts and analytics; let everything else through."""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+            route.abort()
+        else:
+            route.continue_()
+
+    def count_bytes(self, request):
+        """Add a finished request's received bytes (encoded body plus headers), chunked or not."""
+        try:
+            sizes = request.sizes()
+        except Exception:
+            return  # Page or request already gone
+        with self.bytes_lock:
+            self.bytes_transferred += max(sizes["responseBodySize"], 0) + max(sizes["responseHeadersSize"], 0)
+
+    def open_page(self, p):
+        """Launch a browser for one worker using the configured profile."""
+        browser = p.chromium.launch(headless=self.headless)
+        page = browser.new_page()
+        if self.headless:
+            page.route("**/*", self.filter_request)
+        page.on("requestfinished", self.count_bytes)
+        return browser, page
 
-    def collect_info(self):
-        results = []
-        with pw() as p:
-            browser = p.chromium.launch(headless=False)
-            page = browser.new_page()
-            page.goto(self.URL)
-            page.wait_for_timeout(1000)
+    def print_transfer_summary(self, parts):
+        if parts:
+            print(f"Transferred {self.bytes_transferred / 1e6:.1f} MB, {self.bytes_transferred / parts / 1e3:.1f} KB per part")
 
+    def print_wait_summary(self):
+        for label, times in self.wait_times.items():
+            print(f"Wait '{label}': {len(times)} waits, avg {sum(times) / len(times):.0f} ms, max {max(times):.0f} ms")
+
+    def group_by_schematic(self, items):
+        """Bucket parts by their instruction path so each schematic page is visited once."""
+        groups = {}
+        for item in items:
+            key = tuple(item['Instructions'])
+            groups.setdefault(key, []).append(item['MPN'])
+        return groups
+
+    def shard_groups(self, groups, shards):
+        """Split schematic groups into shards by a stable hash of their instruction path."""
+        buckets = [{} for _ in range(shards)]
+        for instructions, mpns in groups.items():
+            key = zlib.crc32("/".join(map(str, instructions)).encode()) % shards
+            buckets[key][instructions] = mpns
+        return [bucket for bucket in buckets if bucket]
+
+    def collect_info(self, run_id=None, resume=False, items=None):
+        """
+        Scrape every part in the database, writing each outcome as soon as it arrives.
+
+        Args:
+            run_id: Checkpoint key for this run, a new one is generated if None.
+            resume: Continue the given run (or the latest one if run_id is None),
+                    skipping parts that already have a checkpoint.
+            items: Parts to scrape (e.g. from scheduler.Scheduler.select), all parts if None.
+
+        Returns:
+            The run id, for metrics.export or a later resume.
+        """
+        if resume and run_id is None:
+            run_id = db.get_latest_run_id()
+        if run_id is None:
+            run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+        if items is None:
             items = db.make_parts_list()
+        if resume:
+            finished = db.get_finished_parts(run_id)
+            items = [item for item in items if item['MPN'] not in finished]
+            print(f"Resuming run {run_id}: {len(finished)} parts already finished")
+        groups = self.group_by_schematic(items)
+        for listener in self.start_listeners:
+            listener(len(items))
 
-            for item in items:
-                mpn = item['MPN']
-                instructions = item['Instructions']
+        if self.shards > 1:
+            shards = self.shard_groups(groups, self.shards)
+            print(f"Run {run_id}: scraping {len(items)} parts across {len(groups)} schematics in {len(shards)} processes")
 
-                try:
-                    self.nav(page, instructions)
-                    page.wait_for_timeout(1000)
+            # Each process gets its own browser(s); the politeness limit is split between them
+            rate_limit = self.rate_limit / len(shards) if self.rate_limit else None
+            config = {
+                "wait_timeout": self.wait_timeout,
+                "workers": self.workers,
+                "rate_limit": rate_limit,
+                "retries": self.retries,
+                "headless": self.headless,
+                "use_fast_path": self.use_fast_path,
+                "use_cache": self.use_cache,
+                "cache_only": self.cache_only,
+                "cache_ttl": self.cache_ttl,
+                "use_nav_cache": self.use_nav_cache
+            }
 
-                except: #Retry if navigation fails
-                    self.nav(page, instructions)
-                    page.wait_for_timeout(1000)
+            # Spawn rather than fork: a forked shard would inherit this process's open SQLite connection
+            spawn = multiprocessing.get_context("spawn")
+            with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=len(shards), mp_context=spawn) as executor:
+                results_queue = manager.Queue()
+                futures = [executor.submit(scrape_shard, config, shard, results_queue) for shard in shards]
+                received = self.write_results(results_queue, len(shards), run_id, futures)
+                for shard, future in zip(shards, futures):
+                    try:
+                        wait_times, bytes_transferred, shard_metrics = future.result()
+                    except Exception as e:
+                        # The process died (e.g. its browser was killed); whatever it hadn't sent is lost
+                        print(f"Shard process failed: {str(e)}")
+                        metrics.increment("scraper_failures_total", reason="shard")
+                        lost = [{"mpn": mpn, "status": "failed"} for mpns in shard.values() for mpn in mpns if mpn not in received]
+                        if lost:
+                            self.save_results(lost, run_id)
+                        continue
+                    for label, times in wait_times.items():
+                        self.wait_times.setdefault(label, []).extend(times)
+                    self.bytes_transferred += bytes_transferred
+                    metrics.merge(shard_metrics)
+        else:
+            print(f"Run {run_id}: scraping {len(items)} parts across {len(groups)} schematics")
+            results_queue = queue.Queue()
+            producer = threading.Thread(target=self.scrape_groups, args=(groups, results_queue), daemon=True)
+            producer.start()
+            self.write_results(results_queue, 1, run_id)
+            producer.join()
 
-                try:
-                    info = self.get_part_info(page, mpn)
-                    page.wait_for_timeout(1000)
+        self.print_wait_summary()
+        self.print_transfer_summary(len(items))
+        return run_id
 
-                except: #Retry if getting part info fails
-                    self.nav(page, instructions)
-                    page.wait_for_timeout(1000)
-                    info = self.get_part_info(page, mpn)
-                    page.wait_for_timeout(1000)
-                
-                if info:
-                    results.append({
-                        "mpn": mpn,
-                        "in_stock": info["In-Stock"],
-                        "price": info["Price"],
-                        "current_mpn": info["MPN"]
-                    })
-                    print(f"Scraped {mpn}: In-Stock: {info['In-Stock']}, Price: {info['Price']}, Current MPN: {info['MPN']}")
-                else:
-                    print(f"Part {mpn} not found or no info available.")
-            
-        for result in results:
+    def write_results(self, results_queue, producers, run_id, futures=None):
+        """
+        Save each batch of results as it arrives until every producer is done. Part updates,
+        price history and checkpoints are only written here; shard processes use their own
+        connections just to remember schematic URLs and fast-path captures.
+
+        Each producer puts lists of results on the queue and None when it has finished.
+        A shard process that dies never sends its None, so when `futures` (one per producer)
+        is given, the loop also stops once every future is done and the queue is empty.
+
+        Returns:
+            Set of MPNs that a result was received for.
+        """
+        done = 0
+        received = set()
+        while done < producers:
             try:
-                db.update_part(
-                    mpn=result["mpn"],
-                    in_stock=1 if result["in_stock"] else 0 if result["in_stock"] is not None else None,
-                    price=result["price"],
-                    new_mpn=result["current_mpn"] if result["current_mpn"] != result["mpn"] else None
-                )
-            except Exception as e:
-                    print(f"Failed to update part {result['mpn']}: {str(e)}")
-
-    def get_part_info(self, page, mpn):            
+                group_results = results_queue.get(timeout=1.0) if futures else results_queue.get()
+            except queue.Empty:
+                if all(future.done() for future in futures):
+                    break
+                continue
+
+            if group_results is None:
+                done += 1
+                continue
+            received.update(result["mpn"] for result in group_results)
+            self.save_results(group_results, run_id)
+        return received
+
+    def scrape_groups(self, groups, results_queue):
+        """Scrape the given schematic groups with the page pool, putting results on the queue."""
+        workers = max(1, min(self.workers, len(groups)))
+
+        work = queue.Queue()
+        for group in groups.items():
+            work.put(group)
+
         try:
-            page.wait_for_timeout(1000)
-            table = page.locator("#oemparts_tblAssmDetails")
-            if not table.is_visible():
-                raise Exception("Table not found")
+            if workers == 1:
+                self.run_worker(work, results_queue)
+            else:
+                threads = [threading.Thread(target=self.run_worker, args=(work, results_queue), daemon=True) for _ in range(workers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            results_queue.put(None)
 
-            rows = table.locator("tbody tr").all()
+    def run_worker(self, work, results_queue):
+        """
+        Drain schematic groups from the queue.
 
-            for row in rows:
-                part_num_cell = row.locator("td.partNum")
+        Each group is tried on the HTTP fast path first (if enabled); this worker's own
+        browser and page are only started the first time a group needs them.
+        """
+        p = None
+        browser = None
+        page = None
+        try:
+            while True:
                 try:
-                    primary_mpn = part_num_cell.locator("span").first.inner_text().strip()
-                except Exception as e:
-                    print(f'Failed to get primary MPN: {str(e)}')
-                    continue
+                    instructions, mpns = work.get_nowait()
+                except queue.Empty:
+                    break
+                instructions = list(instructions)
 
-                replaced_mpn = None
+                # A failure here only costs this group; the worker keeps draining the queue
                 try:
-                    second_span = part_num_cell.locator("span").nth(1)
-                    replaced_text = part_num_cell.locator('p').inner_text(timeout=1000).strip()
-                    if replaced_text and "replaces part #" in replaced_text:
-                        match = re.search(r'replaces part #\s*([\w-]+)', replaced_text)
-                        if match:
-                            replaced_mpn = match.group(1)
+                    index = self.cached_index(instructions) if self.cache else None
+                    if index is None and self.fast_path and not self.cache_only:
+                        index = self.fetch_fast(instructions)
+                    if index is None and not self.cache_only:
+                        if p is None:
+                            p = pw().start()
+                        if page is None:
+                            browser, page = self.open_page(p)
+                            self.limiter.wait()
+                            page.goto(self.URL, wait_until="domcontentloaded")
+                        index = self.browse_table(page, instructions)
                 except Exception as e:
-                    replaced_mpn = None
-                
-                if mpn == primary_mpn or mpn == replaced_mpn:
-                    in_stock_text = row.locator("td.status").inner_text(timeout=1000).strip()
-                    msrp_text = row.locator("td.regPrice").inner_text(timeout=1000).strip()
-                    our_price_text = row.locator("td.ourPrice").inner_text(timeout=1000).strip()
-
-                    in_stock = "In-Stock" in in_stock_text
-
-                    price = None
-                    if our_price_text and our_price_text != "-" and "$" in our_price_text:
-                        try:
-                            price = float(our_price_text.replace("$", "").replace(",", "").strip())
-                        except ValueError:
-                            pass
-                    elif msrp_text and msrp_text != "-" and "$" in msrp_text:
-                        try:
-                            price = float(msrp_text.replace("$", "").replace(",", "").strip())
-                        except ValueError:
-                            pass
-                    
-                    return {
-                        "In-Stock": in_stock,
-                        "Price": price,
-                        "MPN": primary_mpn
-                    }
-                
+                    print(f"Worker failed on {instructions}: {str(e)}")
+                    metrics.increment("scraper_failures_total", reason="worker")
+                    index = None
+
+                results_queue.put(self.resolve_group(instructions, mpns, index))
+
+        finally:
+            if browser:
+                browser.close()
+            if p:
+                p.stop()
+
+    def cached_index(self, instructions):
+        """Index a schematic from its cached snapshot; None if it isn't cached or has expired."""
+        html = self.cache.get(instructions)
+        if html is None:
+            metrics.increment("scraper_cache_misses_total")
             return None
-            
+        with metrics.timer("scraper_table_seconds", source="cache"):
+            rows = fast_path.parse_table_html(html)
+            return self.index_rows(rows) if rows else None
+
+    def fetch_fast(self, instructions):
+        """Load a schematic's table without a browser; None if there is no captured request or it failed."""
+        recipe = db.get_fast_path_request(instructions)
+        if recipe is None:
+            return None
+
+        try:
+            self.limiter.wait()
+            with metrics.timer("scraper_table_seconds", source="fast_path"):
+                html = fast_path.find_table_html(self.fast_path.fetch(recipe))
+                rows = fast_path.parse_table_html(html) if html else []
+        except Exception as e:
+            print(f"Fast path failed for {instructions}: {str(e)}")
+            rows = []
+
+        if not rows:
+            # Stale capture, fall back to the browser which will capture a fresh one
+            metrics.increment("scraper_fast_path_fallbacks_total")
+            db.delete_fast_path_request(instructions)
+            return None
+        if self.cache:
+            self.cache.put(instructions, html)
+        return self.index_rows(rows)
+
+    def browse_table(self, page, instructions):
+        """Navigate to one schematic in the browser and index its table; None if every attempt fails."""
+        for attempt in range(self.retries + 1):
+            try:
+                if self.fast_path:
+                    # The table arrives in a background request after the last dropdown is picked,
+                    # so keep recording until it is on the page
+                    def navigate():
+                        self.nav(page, instructions)
+                        self.wait_for_table(page)
+                    recipe = self.fast_path.capture(page, navigate)
+                    index = self.load_table(page, instructions, wait=False)
+                else:
+                    recipe = None
+                    self.nav(page, instructions)
+                    index = self.load_table(page, instructions)
+
+                if recipe:
+                    db.save_fast_path_request(instructions, recipe)
+                if self.use_nav_cache and page.url != db.get_schematic_url(instructions):
+                    db.save_schematic_url(instructions, page.url)
+                return index
+
+            except Exception as e: #Retry if navigation or reading the table fails
+                print(f"Attempt {attempt + 1} failed for {instructions}: {str(e)}")
+                if attempt < self.retries:
+                    metrics.increment("scraper_retries_total")
+
+        metrics.increment("scraper_failures_total", reason="schematic")
+        return None
+
+    def resolve_group(self, instructions, mpns, index):
+        """Resolve every MPN of a schematic group from its table index."""
+        if index is None:
+            print(f"Skipping {len(mpns)} part(s) on schematic {instructions}")
+            return [{"mpn": mpn, "status": "failed"} for mpn in mpns]
+
+        group_results = []
+        for mpn in mpns:
+            info = index.get(mpn)
+
+            if info:
+                group_results.append({
+                    "mpn": mpn,
+                    "status": "done",
+                    "in_stock": info["In-Stock"],
+                    "price": info["Price"],
+                    "current_mpn": info["MPN"]
+                })
+                print(f"Scraped {mpn}: In-Stock: {info['In-Stock']}, Price: {info['Price']}, Current MPN: {info['MPN']}")
+            else:
+                group_results.append({"mpn": mpn, "status": "not_found"})
+                print(f"Part {mpn} not found or no info available.")
+
+        return group_results
+
+    def save_results(self, results, run_id):
+        """
+        Write a batch of results and their checkpoints, each in a single transaction.
+
+        Cache-only results come from old snapshots, so they don't refresh Date or add
+        price history (which the scheduler would read as fresh observations).
+        """
+        updates = []
+        outcomes = []
+        observations = []
+        for result in results:
+            outcomes.append((result["mpn"], result["status"]))
+            if result["status"] == "done":
+                updates.append((
+                    result["mpn"],
+                    1 if result["in_stock"] else 0 if result["in_stock"] is not None else None,
+                    result["price"],
+                    result["current_mpn"] if result["current_mpn"] != result["mpn"] else None
+                ))
+                if result["current_mpn"] != result["mpn"]:
+                    outcomes.append((result["current_mpn"], result["status"]))
+                observations.append((result["current_mpn"], result["price"], 1 if result["in_stock"] else 0))
+
+        try:
+            db.update_parts_many(updates, stamp_date=not self.cache_only)
+            if not self.cache_only:
+                db.add_price_history_many(run_id, observations)
+            db.add_checkpoints_many(run_id, outcomes)
+        except Exception as e:
+            print(f"Failed to save results for {[mpn for mpn, _ in outcomes]}: {str(e)}")
+            metrics.increment("scraper_failures_total", reason="save")
+            return
+
+        for result in results:
+            metrics.increment("scraper_parts_total", status=result["status"])
+
+        for listener in self.result_listeners:
+            listener(results)
+
+    def parse_price(self, text):
+        if text and text != "-" and "$" in text:
+            try:
+                return float(text.replace("$", "").replace(",", "").strip())
+            except ValueError:
+                pass
+        return None
+
+    def load_table(self, page, instructions=None, wait=True):
+        """
+        Read the whole assembly table in one in-page evaluation and index it.
+
+        When the cache is on and the instruction path is given, the table's HTML is
+        snapshotted to the cache and parsed from that instead. Pass wait=False if the
+        caller has already waited for the table.
+
+        Returns a dict keyed by both the primary MPN and the replaced MPN (if any),
+        mapping to {"In-Stock", "Price", "MPN"} where "MPN" is the current part number.
+        """
+        if wait:
+            try:
+                self.wait_for_table(page)
+            except Exception:
+                raise Exception("Table not found")
+        table = page.locator("#oemparts_tblAssmDetails")
+
+        with metrics.timer("scraper_table_seconds", source="browser"):
+            if self.cache and instructions is not None:
+                html = table.evaluate("table => table.outerHTML")
+                self.cache.put(instructions, html)
+                return self.index_rows(fast_path.parse_table_html(html))
+
+            return self.index_rows(table.evaluate(TABLE_SCRIPT))
+
+    def index_rows(self, rows):
+        """Index table rows (from TABLE_SCRIPT or fast_path.parse_table_html) by primary and replaced MPN."""
+        index = {}
+        for row in rows:
+            primary_mpn = row["partNum"]
+            if not primary_mpn:
+                continue
+
+            replaced_mpn = None
+            if "replaces part #" in row["replaces"]:
+                match = re.search(r'replaces part #\s*([\w-]+)', row["replaces"])
+                if match:
+                    replaced_mpn = match.group(1)
+
+            # Prefer our price, fall back to MSRP when no price is listed
+            if "$" in row["ourPrice"]:
+                price = self.parse_price(row["ourPrice"])
+            else:
+                price = self.parse_price(row["regPrice"])
+
+            info = {
+                "In-Stock": "In-Stock" in row["status"],
+                "Price": price,
+                "MPN": primary_mpn
+            }
+            # First match wins, same as scanning the rows top to bottom
+            index.setdefault(primary_mpn, info)
+            if replaced_mpn:
+                index.setdefault(replaced_mpn, info)
+
+        return index
+
+    def get_part_info(self, page, mpn, index=None, instructions=None):
+        """
+        Look up one part. Uses the given index, else the cached snapshot for `instructions`
+        (page may then be None), else reads the table from the page.
+        """
+        try:
+            if index is None and instructions is not None and self.cache:
+                index = self.cached_index(instructions)
+            if index is None:
+                index = self.load_table(page, instructions)
+            return index.get(mpn)
+
         except Exception as e:
             raise Exception(f"Failed to get part info: {str(e)}")
 
+    def goto_cached(self, page, instructions):
+        """
+        Try the remembered URL for this schematic.
+
+        Returns True if it loaded the right table; False (and forgets the URL) if the
+        site has moved it, so the caller replays the dropdowns instead.
+        """
+        url = db.get_schematic_url(instructions)
+        if not url:
+            return False
+
+        try:
+            self.limiter.wait()
+            page.goto(url, wait_until="domcontentloaded")
+            self.wait_for_table(page)
+            if len(instructions) > 1 and not page.evaluate(SCHEMATIC_SCRIPT, instructions[-1]):
+                raise Exception("wrong schematic")
+            return True
+
+        except Exception as e:
+            print(f"Cached URL failed for {instructions}: {str(e)}")
+            metrics.increment("scraper_nav_cache_misses_total")
+            db.save_schematic_url(instructions, None)
+            return False
+
     def nav(self, page, instructions):
+        start = time.perf_counter()
+        if self.use_nav_cache and self.goto_cached(page, instructions):
+            metrics.observe("scraper_nav_seconds", time.perf_counter() - start, method="cached_url")
+            return page
+
         choice_titles = [
             "Second Choice",
             "Third Choice",
@@ -129,31 +582,48 @@ class Scraper:
 
         try:
             brand = instructions[0]
-            page.goto(self.URL + f"/{brand}")
-            page.wait_for_timeout(1000)
+            self.limiter.wait()
+            page.goto(self.URL + f"/{brand}", wait_until="domcontentloaded")
 
             for i, instruction in enumerate(instructions[1:-1], start=1):
                 if i > 5:
                     break
                 title = choice_titles[i - 1]
                 selector = f"select[title='{title}']"
+                self.wait_for_option(page, selector, instruction)
+                self.limiter.wait()
                 page.locator(selector).select_option(value=instruction)
-                page.wait_for_timeout(500)
 
             if len(instructions) > 1:
                 final_instruction = instructions[-1]
                 schematic_selector = "select[title='Parts Schematic']"
+                self.wait_for_option(page, schematic_selector, final_instruction)
+                self.limiter.wait()
                 page.locator(schematic_selector).select_option(value=final_instruction)
-                page.wait_for_timeout(500)
 
+            metrics.observe("scraper_nav_seconds", time.perf_counter() - start, method="dropdowns")
             return page
         
         except Exception as e:
             print(f"Navigation Failed: {str(e)}")
+            metrics.increment("scraper_failures_total", reason="navigation")
+            # The page may still show the previous schematic, so let browse_table retry
+            raise
+
+def scrape_shard(config, groups, results_queue):
+    """Worker process entry point: scrape one shard, streaming results back to the parent."""
+    s = Scraper(**config)
+    s.scrape_groups(groups, results_queue)
+    return s.wait_times, s.bytes_transferred, metrics.snapshot()
 
 if __name__ == "__main__":
-    s = Scraper()
-    s.collect_info()
+    parser = argparse.ArgumentParser(description="Refresh stock and price for every part in the database.")
+    refresh_options.add_refresh_arguments(parser)
+    args = parser.parse_args()
+
+    s = Scraper(**refresh_options.scraper_kwargs(args))
+    run_id = s.collect_info(**refresh_options.collect_kwargs(args))
+    metrics.export(run_id)
 # This code is designed to accept a list of instructions created by the database script.
 # If you want to test this code, you should use the 'part_finder.py' script to add some parts
 # to the database first, as it captures the instructions needed for the scraper to get to the 
@@ -0,0 +1,23 @@
+import time
+import threading
+
+"""
+Shared request pacing for anything that talks to a remote site or API.
+"""
+
+class RateLimiter:
+    """Spaces out requests so that all workers together stay under `rate` requests per second."""
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)